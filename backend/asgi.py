@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_asgi_application()
+
+# Warm per-worker caches so the first scans don't hit the database
+from facility.registry import facility_registry  # noqa: E402
+
+facility_registry.warm()
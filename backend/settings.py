@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 from datetime import timedelta
+from celery.schedules import crontab
 import os
 
 
@@ -62,6 +63,60 @@ INSTALLED_APPS = [
 CELERY_BROKER_URL = 'redis://localhost:6379/0'
 CELERY_RESULT_BACKEND = 'redis://localhost:6379/0'
 
+# Shared across gunicorn workers (facility registry version counter, etc.)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': 'redis://localhost:6379/1',
+    }
+}
+
+# Write-behind buffering of AccessLog inserts on the scan path. Off by default;
+# a hard crash loses at most MAX_SIZE rows / MAX_DELAY seconds of logs.
+ACCESS_LOG_BUFFER = {
+    'ENABLED': False,
+    'MAX_SIZE': 50,
+    'MAX_DELAY': 2.0,  # seconds
+}
+
+# Memory-mapped member entitlement snapshot read by the scan endpoint.
+# Rebuild with `python manage.py rebuild_entitlements`.
+ENTITLEMENTS_FILE = os.path.join(BASE_DIR, 'entitlements.bin')
+
+# How long a signed offline access pass stays valid
+ACCESS_PASS_LIFETIME = timedelta(hours=1)
+
+# Check-ins older than this no longer count towards live facility occupancy
+OCCUPANCY_MAX_STAY = timedelta(hours=4)
+
+# Repeat failed scans by one member at one facility within this window are
+# folded into the existing admin alert
+FAILED_ACCESS_ALERT_WINDOW = timedelta(minutes=10)
+
+# Members rendered per PDF chunk in the membership report
+REPORT_CHUNK_SIZE = 500
+
+# Processes laying out per-facility report sections in background report jobs;
+# None uses every CPU. Renders inside a web request use the smaller limit.
+REPORT_RENDER_WORKERS = None
+REPORT_SYNC_RENDER_WORKERS = 2
+
+# Access-log reports spanning more days than this (or open-ended) requested
+# with GET are queued as background jobs unless already cached
+REPORT_SYNC_MAX_DAYS = 31
+
+# Thresholds for facility.anomaly.ScanAnomalyDetector (windows and cooldown in seconds)
+SCAN_ANOMALY_DETECTOR = {
+    'BURST_SIZE': 5,
+    'BURST_WINDOW': 60,
+    'FACILITY_BURST_SIZE': 20,
+    'TRAVEL_WINDOW': 30,
+    'METHOD_MIX_SIZE': 3,
+    'METHOD_MIX_WINDOW': 300,
+    'ALERT_COOLDOWN': 300,
+    'MAX_TRACKED': 10000,
+}
+
 AUTHENTICATION_BACKENDS = [
     'account.authentication.EmailBackend',  # Replace `account` with your app name
     'django.contrib.auth.backends.ModelBackend',  # keep this as fallback
@@ -90,6 +145,14 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'notification.tasks.send_membership_expiry_notifications',
         'schedule': 86400.0,  # every 24 hours
     },
+    'reconcile-facility-occupancy': {
+        'task': 'facility.tasks.reconcile_occupancy',
+        'schedule': 300.0,  # every 5 minutes
+    },
+    'run-scheduled-reports-nightly': {
+        'task': 'reports.tasks.run_scheduled_reports',
+        'schedule': crontab(hour=2, minute=0),  # CELERY_TIMEZONE
+    },
 }
 
 
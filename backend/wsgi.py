@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# Warm per-worker caches so the first scans don't hit the database
+from facility.registry import facility_registry  # noqa: E402
+
+facility_registry.warm()
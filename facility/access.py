@@ -0,0 +1,41 @@
+from typing import NamedTuple, Optional
+
+# Define tier hierarchy
+TIER_HIERARCHY = {
+    'tier1': 1,
+    'tier2': 2,
+    'tier3': 3
+}
+
+
+class AccessDecision(NamedTuple):
+    status: str
+    reason: Optional[str]
+    user_tier: str  # Value stored in AccessLog.user_tier_at_time
+
+
+def is_membership_active_on(start_date, end_date, on_date):
+    """Same rule as CustomUser.is_membership_active, evaluated for any date."""
+    if not start_date or not end_date:
+        return False
+    return start_date <= on_date <= end_date
+
+
+def decide_check_out(is_trainer, user_tier):
+    """Leaving a facility is always allowed; the scan only updates occupancy."""
+    return AccessDecision('success', None, 'trainer' if is_trainer else user_tier)
+
+
+def decide_access(is_trainer, user_tier, membership_start_date, membership_end_date, required_tier, on_date):
+    """Apply the trainer/membership/tier rules used by the QR scan endpoints."""
+    if is_trainer:
+        return AccessDecision('success', None, 'trainer')
+
+    if not is_membership_active_on(membership_start_date, membership_end_date, on_date):
+        return AccessDecision('failed', "Inactive membership", user_tier)
+
+    if TIER_HIERARCHY[user_tier] < TIER_HIERARCHY[required_tier]:
+        reason = f"Required tier is {required_tier}, but your tier is {user_tier}"
+        return AccessDecision('failed', reason, user_tier)
+
+    return AccessDecision('success', None, user_tier)
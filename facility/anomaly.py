@@ -0,0 +1,120 @@
+import threading
+from collections import OrderedDict, deque
+
+from django.conf import settings
+
+
+class LRUDict(OrderedDict):
+    """OrderedDict that keeps only the ``max_size`` most recently used keys."""
+
+    def __init__(self, max_size):
+        super().__init__()
+        self.max_size = max_size
+
+    def get_or_create(self, key, factory):
+        try:
+            self.move_to_end(key)
+            return self[key]
+        except KeyError:
+            return self.put(key, factory())
+
+    def put(self, key, value):
+        self[key] = value
+        self.move_to_end(key)
+        if len(self) > self.max_size:
+            self.popitem(last=False)
+        return value
+
+
+class _UserWindow:
+    __slots__ = ('failures', 'last_facility_id', 'last_seen', 'methods')
+
+    def __init__(self, burst_size):
+        self.failures = deque(maxlen=burst_size)
+        self.last_facility_id = None
+        self.last_seen = None
+        self.methods = {}  # scan_method -> last time seen; at most one entry per method
+
+
+class ScanAnomalyDetector:
+    """Sliding-window checks over the scan stream, O(1) time per scan.
+
+    Flags:
+      * ``failed_burst``: a member fails ``burst_size`` scans within ``burst_window`` seconds
+      * ``facility_failed_burst``: a facility sees ``facility_burst_size`` failures within ``burst_window``
+      * ``impossible_travel``: a member is let in at two facilities less than ``travel_window``
+        seconds apart without checking out in between
+      * ``method_mix``: a member uses ``method_mix_size`` distinct scan methods within ``method_mix_window``
+
+    Each failure deque is capped at the burst size and per-member/per-facility
+    state is kept for at most ``max_tracked`` keys (least recently seen are
+    dropped), so memory is bounded. Each worker process watches only the scans
+    it records.
+    """
+
+    def __init__(self, burst_size=5, burst_window=60, facility_burst_size=20, travel_window=30,
+                 method_mix_size=3, method_mix_window=300, alert_cooldown=300, max_tracked=10000):
+        self.burst_size = burst_size
+        self.burst_window = burst_window
+        self.facility_burst_size = facility_burst_size
+        self.travel_window = travel_window
+        self.method_mix_size = method_mix_size
+        self.method_mix_window = method_mix_window
+        self.alert_cooldown = alert_cooldown
+        # Scans older than this (e.g. replayed offline batches) can't complete any window
+        self.max_window = max(burst_window, travel_window, method_mix_window)
+        self._lock = threading.Lock()
+        self._users = LRUDict(max_tracked)
+        self._facilities = LRUDict(max_tracked)
+        self._alerted = LRUDict(max_tracked)
+
+    @classmethod
+    def from_settings(cls):
+        return cls(**{key.lower(): value for key, value in getattr(settings, 'SCAN_ANOMALY_DETECTOR', {}).items()})
+
+    def observe(self, user_id, facility_id, status, scan_method, at, direction='in'):
+        """Feed one scan (``at`` in epoch seconds) and return the anomalies it completes."""
+        anomalies = []
+        with self._lock:
+            user = self._users.get_or_create(user_id, lambda: _UserWindow(self.burst_size))
+
+            if status == 'failed':
+                user.failures.append(at)
+                if len(user.failures) == self.burst_size and at - user.failures[0] <= self.burst_window:
+                    anomalies.append(('failed_burst', {'failures': self.burst_size, 'seconds': round(at - user.failures[0])}))
+
+                failures = self._facilities.get_or_create(facility_id, lambda: deque(maxlen=self.facility_burst_size))
+                failures.append(at)
+                if len(failures) == self.facility_burst_size and at - failures[0] <= self.burst_window:
+                    anomalies.append(('facility_failed_burst', {'failures': self.facility_burst_size, 'seconds': round(at - failures[0])}))
+
+            if direction == 'out':
+                # Checking out then into the next room seconds later is the normal flow
+                user.last_facility_id = user.last_seen = None
+            elif status == 'success':
+                # A denied scan doesn't mean the account was used at that facility
+                if (user.last_facility_id is not None and user.last_facility_id != facility_id
+                        and 0 <= at - user.last_seen <= self.travel_window):
+                    anomalies.append(('impossible_travel', {
+                        'previous_facility_id': user.last_facility_id,
+                        'seconds': round(at - user.last_seen)
+                    }))
+                user.last_facility_id, user.last_seen = facility_id, at
+
+            user.methods[scan_method] = at
+            recent = [method for method, seen in user.methods.items() if at - seen <= self.method_mix_window]
+            if len(recent) >= self.method_mix_size:
+                anomalies.append(('method_mix', {'scan_methods': sorted(recent)}))
+
+            return [anomaly for anomaly in anomalies if self._should_alert(anomaly[0], user_id, facility_id, at)]
+
+    def _should_alert(self, kind, user_id, facility_id, at):
+        subject = (kind, facility_id) if kind == 'facility_failed_burst' else (kind, user_id)
+        last = self._alerted.get(subject)
+        if last is not None and at - last < self.alert_cooldown:
+            return False
+        self._alerted.put(subject, at)
+        return True
+
+
+scan_anomaly_detector = ScanAnomalyDetector.from_settings()
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class FacilityConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'facility'
+
+    def ready(self):
+        import facility.signals as signals
+        _ = signals  # to avoid Pylance 'not accessed' warning
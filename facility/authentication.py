@@ -0,0 +1,63 @@
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from account.models import CustomUser
+from .entitlements import entitlement_table
+
+
+class ScanUser:
+    """Request user for the scan endpoint, backed by the entitlement table."""
+    is_authenticated = True
+    is_anonymous = False
+    is_staff = False
+
+    def __init__(self, entitlement):
+        self.entitlement = entitlement
+        self.id = self.pk = entitlement.user_id
+        self.is_active = entitlement.is_active
+        self.is_trainer = entitlement.is_trainer
+        self.is_admin = entitlement.is_admin
+        self.type_of_membership = entitlement.type_of_membership
+        self.membership_start_date = entitlement.membership_start_date
+        self.membership_end_date = entitlement.membership_end_date
+
+    @property
+    def is_membership_active(self):
+        return self.entitlement.is_membership_active
+
+    @cached_property
+    def full_name(self):
+        # Only needed for the success response; fetch the single column
+        return CustomUser.objects.filter(pk=self.id).values_list('full_name', flat=True).first()
+
+    def __str__(self):
+        return f"ScanUser {self.id}"
+
+
+class ScanJWTAuthentication(JWTAuthentication):
+    """JWT authentication for scan-only endpoints.
+
+    Resolves the token's user from the entitlement table instead of loading the
+    CustomUser row, and falls back to the regular lookup when the table has no
+    record for the user.
+    """
+
+    def get_user(self, validated_token):
+        if api_settings.CHECK_REVOKE_TOKEN:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = int(validated_token[api_settings.USER_ID_CLAIM])
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        entitlement = entitlement_table.get(user_id)
+        if entitlement is None:
+            return super().get_user(validated_token)
+
+        if not entitlement.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        return ScanUser(entitlement)
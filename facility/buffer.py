@@ -0,0 +1,104 @@
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+
+from .models import AccessLog
+
+logger = logging.getLogger(__name__)
+
+
+class AccessLogBuffer:
+    """Write-behind buffer for AccessLog rows produced on the scan path.
+
+    Rows are queued in memory and written with a single bulk_create once
+    ``max_size`` rows are pending or ``max_delay`` seconds have passed since the
+    first one was queued. Flushed rows fire post_save exactly like create(), so
+    the failed-access notification still runs for failed scans.
+
+    Crash safety: pending rows live only in this process, so a hard crash loses
+    at most ``max_size`` rows / ``max_delay`` seconds of logs. The buffer is
+    flushed on interpreter exit, and a failed bulk insert falls back to saving
+    rows one by one so a single bad row can't drop the whole batch. Receiver
+    failures after a successful insert never trigger that fallback, so rows
+    are not written twice.
+    """
+
+    def __init__(self, enabled=False, max_size=50, max_delay=2.0):
+        self.enabled = enabled
+        self.max_size = max_size
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._pending = []
+        self._timer = None
+
+    @classmethod
+    def from_settings(cls):
+        config = getattr(settings, 'ACCESS_LOG_BUFFER', {})
+        return cls(
+            enabled=config.get('ENABLED', False),
+            max_size=config.get('MAX_SIZE', 50),
+            max_delay=config.get('MAX_DELAY', 2.0),
+        )
+
+    def add(self, **fields):
+        log = AccessLog(**fields)
+        with self._lock:
+            self._pending.append(log)
+            full = len(self._pending) >= self.max_size
+            if not full and self._timer is None:
+                self._timer = threading.Timer(self.max_delay, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            # Back-pressure: the request that fills the buffer pays for the flush
+            self.flush()
+        return log
+
+    def flush(self):
+        with self._lock:
+            logs, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if not logs:
+            return 0
+
+        try:
+            AccessLog.objects.bulk_log(logs)
+        except DatabaseError as e:
+            logger.error(f"Bulk insert of {len(logs)} access logs failed, saving individually: {e}")
+            self._save_individually(logs)
+        return len(logs)
+
+    def _save_individually(self, logs):
+        for log in logs:
+            log.pk = None
+            try:
+                log.save()
+            except DatabaseError as e:
+                if log.pk is not None:
+                    # Inserted; only a post_save receiver failed
+                    logger.error(f"post_save handling failed for access log {log.pk}: {e}")
+                else:
+                    logger.error(f"Dropping access log for user {log.user_id} at facility {log.facility_id}: {e}")
+
+    def _flush_from_timer(self):
+        try:
+            self.flush()
+        finally:
+            # The timer thread owns its own DB connection; don't leak it
+            connections.close_all()
+
+
+access_log_buffer = AccessLogBuffer.from_settings()
+atexit.register(access_log_buffer.flush)
+
+
+def record_access(**fields):
+    """Record a scan decision, buffering it when write-behind is enabled."""
+    if access_log_buffer.enabled:
+        return access_log_buffer.add(**fields)
+    return AccessLog.objects.create(**fields)
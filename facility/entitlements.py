@@ -0,0 +1,159 @@
+import fcntl
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import date
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+
+TIER_CODES = {'tier1': 1, 'tier2': 2, 'tier3': 3}
+TIER_NAMES = {code: name for name, code in TIER_CODES.items()}
+
+FLAG_PRESENT = 0x01
+FLAG_ACTIVE = 0x02
+FLAG_TRAINER = 0x04
+FLAG_ADMIN = 0x08
+
+# flags, tier code, padding, membership start/end as date ordinals (0 = not set)
+RECORD = struct.Struct('<BBxxii')
+
+
+class Entitlement(NamedTuple):
+    user_id: int
+    is_active: bool
+    is_trainer: bool
+    is_admin: bool
+    type_of_membership: Optional[str]
+    membership_start_date: Optional[date]
+    membership_end_date: Optional[date]
+
+    @property
+    def is_membership_active(self):
+        """Same rule as CustomUser.is_membership_active."""
+        if not self.membership_start_date or not self.membership_end_date:
+            return False
+        return self.membership_start_date <= date.today() <= self.membership_end_date
+
+
+def _pack(user):
+    flags = FLAG_PRESENT
+    if user.is_active:
+        flags |= FLAG_ACTIVE
+    if user.is_trainer:
+        flags |= FLAG_TRAINER
+    if user.is_admin:
+        flags |= FLAG_ADMIN
+    start = user.membership_start_date.toordinal() if user.membership_start_date else 0
+    end = user.membership_end_date.toordinal() if user.membership_end_date else 0
+    return RECORD.pack(flags, TIER_CODES.get(user.type_of_membership, 0), start, end)
+
+
+class EntitlementTable:
+    """Fixed-width, memory-mapped snapshot of what an access decision needs.
+
+    Record ``n`` of the file belongs to user id ``n``, so a lookup is a single
+    offset read with no ORM involved. The file is shared by every worker through
+    the page cache: post_save writes one record in place, and a full rebuild
+    swaps in a new file, which readers notice by its inode changing. Writers
+    serialize on an flock of a sidecar ``.lock`` file, so a record written
+    during a rebuild lands in the new file instead of the one being replaced.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._map = None
+        self._inode = None
+
+    def _mapping(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            if self._map is None or stat.st_ino != self._inode or stat.st_size > len(self._map):
+                if self._map is not None:
+                    self._map.close()
+                    self._map = None
+                if stat.st_size == 0:
+                    return None
+                with open(self.path, 'rb') as f:
+                    self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._inode = stat.st_ino
+            return self._map
+
+    def get(self, user_id):
+        """Return the user's Entitlement, or None if the table has no record."""
+        offset = user_id * RECORD.size
+        mapping = self._mapping()
+        if mapping is None or user_id < 0 or offset + RECORD.size > len(mapping):
+            return None
+        flags, tier, start, end = RECORD.unpack_from(mapping, offset)
+        if not flags & FLAG_PRESENT:
+            return None
+        return Entitlement(
+            user_id=user_id,
+            is_active=bool(flags & FLAG_ACTIVE),
+            is_trainer=bool(flags & FLAG_TRAINER),
+            is_admin=bool(flags & FLAG_ADMIN),
+            type_of_membership=TIER_NAMES.get(tier),
+            membership_start_date=date.fromordinal(start) if start else None,
+            membership_end_date=date.fromordinal(end) if end else None,
+        )
+
+    @contextmanager
+    def _write_lock(self):
+        directory = os.path.dirname(self.path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd = os.open(f'{self.path}.lock', os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
+
+    def _write_at(self, user_id, record):
+        # Blocks while a rebuild runs, then writes into the file it swapped in
+        with self._write_lock():
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                os.pwrite(fd, record, user_id * RECORD.size)
+            finally:
+                os.close(fd)
+
+    def update(self, user):
+        """Write one user's record in place."""
+        self._write_at(user.pk, _pack(user))
+
+    def remove(self, user_id):
+        self._write_at(user_id, bytes(RECORD.size))
+
+    def rebuild(self, users):
+        """Write a fresh table for ``users`` and atomically swap it in.
+
+        ``users`` should be lazy (e.g. a queryset iterator) so it is read while
+        the write lock is held; updates made meanwhile wait and are applied to
+        the new table.
+        """
+        directory = os.path.dirname(self.path) or '.'
+        with self._write_lock():
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.entitlements-')
+            count = 0
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    for user in users:
+                        f.seek(user.pk * RECORD.size)
+                        f.write(_pack(user))
+                        count += 1
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        return count
+
+
+entitlement_table = EntitlementTable(settings.ENTITLEMENTS_FILE)
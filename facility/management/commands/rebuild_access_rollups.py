@@ -0,0 +1,28 @@
+from datetime import timezone as dt_timezone
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncHour
+from facility.models import AccessLog, AccessLogRollup
+
+class Command(BaseCommand):
+    help = 'Rebuild the hourly AccessLog rollup table from the raw access logs'
+
+    def handle(self, *args, **kwargs):
+        buckets = (
+            AccessLog.objects
+            .exclude(direction='out')
+            .annotate(hour=TruncHour('timestamp', tzinfo=dt_timezone.utc))
+            .values('facility_id', 'hour', 'status', 'user_tier_at_time', 'scan_method', 'user_is_admin')
+            .annotate(count=Count('id'))
+            .order_by()
+        )
+
+        with transaction.atomic():
+            AccessLogRollup.objects.all().delete()
+            rollups = AccessLogRollup.objects.bulk_create(
+                (AccessLogRollup(**bucket) for bucket in buckets.iterator(chunk_size=2000)),
+                batch_size=1000
+            )
+
+        self.stdout.write(f"Rebuilt {len(rollups)} hourly access log rollups")
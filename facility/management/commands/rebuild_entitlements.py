@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from account.models import CustomUser
+from facility.entitlements import entitlement_table
+
+class Command(BaseCommand):
+    help = 'Rebuild the memory-mapped member entitlement table used by the scan endpoint'
+
+    def handle(self, *args, **kwargs):
+        users = CustomUser.objects.only(
+            'id', 'is_active', 'is_trainer', 'is_admin', 'type_of_membership',
+            'membership_start_date', 'membership_end_date'
+        ).iterator(chunk_size=2000)
+
+        count = entitlement_table.rebuild(users)
+        self.stdout.write(f"Wrote {count} entitlements to {entitlement_table.path}")
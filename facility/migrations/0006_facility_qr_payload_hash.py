@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facility', '0005_accesslog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='facility',
+            name='qr_payload_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+    ]
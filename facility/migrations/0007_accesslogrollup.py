@@ -0,0 +1,31 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facility', '0006_facility_qr_payload_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccessLogRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('status', models.CharField(choices=[('success', 'Success'), ('failed', 'Failed')], max_length=10)),
+                ('user_tier_at_time', models.CharField(blank=True, max_length=10, null=True)),
+                ('scan_method', models.CharField(max_length=20)),
+                ('user_is_admin', models.BooleanField(default=False)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('facility', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='access_rollups', to='facility.facility')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hour'], name='facility_ac_hour_7a7096_idx')],
+                'constraints': [models.UniqueConstraint(fields=('facility', 'hour', 'status', 'user_tier_at_time', 'scan_method', 'user_is_admin'), name='unique_access_log_rollup_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:21
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facility', '0007_accesslogrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='accesslog',
+            index=models.Index(fields=['facility', 'timestamp'], name='facility_ac_facilit_9e3e80_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='accesslog',
+            index=models.Index(fields=['user', 'timestamp'], name='facility_ac_user_id_48ac41_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facility', '0008_accesslog_range_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accesslog',
+            name='direction',
+            field=models.CharField(choices=[('in', 'Check-in'), ('out', 'Check-out')], default='in', max_length=3),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.4 on 2026-10-18 12:15
+
+from django.db import migrations, models
+
+def snapshot_admin_flags(apps, schema_editor):
+    # Older logs never stored the flag; the member's current one is the best guess
+    AccessLog = apps.get_model('facility', 'AccessLog')
+    AccessLog.objects.filter(user__is_admin=True).update(user_is_admin=True)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facility', '0009_accesslog_direction'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='accesslog',
+            name='user_is_admin',
+            field=models.BooleanField(default=False, editable=False),
+        ),
+        migrations.RunPython(snapshot_admin_flags, migrations.RunPython.noop),
+    ]
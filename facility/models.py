@@ -1,10 +1,16 @@
-import qrcode
-import json
 import uuid
-from io import BytesIO
-from django.core.files.base import ContentFile
-from django.db import models
+from collections import Counter
+from datetime import timezone as dt_timezone
+from django.contrib.auth import get_user_model
+from django.db import models, transaction, DatabaseError, IntegrityError
+from django.db.models import F
+from django.db.models.signals import post_save
 from django.conf import settings
+from django.utils import timezone
+from .qr import encode_payload, payload_hash, store_qr_image
+import logging
+
+logger = logging.getLogger(__name__)
 
 class Facility(models.Model):
     uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
@@ -14,40 +20,55 @@ class Facility(models.Model):
         choices=[('tier1', 'Tier 1'), ('tier2', 'Tier 2'), ('tier3', 'Tier 3')]
     )
     qr_code = models.ImageField(upload_to='qrcodes/', blank=True, null=True)
+    qr_payload_hash = models.CharField(max_length=64, blank=True, default='', editable=False)  # Hash of the payload qr_code encodes
 
     def __str__(self):
         return self.name
 
-    def generate_qr_code(self):
-        """Generate a QR code for the facility and save it."""
-        data = json.dumps({
-            "uuid": str(self.uuid),
-            "name": self.name,
-            "required_tier": self.required_tier
-        })
-
-        qr = qrcode.make(data)
+    @property
+    def qr_payload(self):
+        return encode_payload(self.uuid)
 
-        # Save the QR code image
-        buffer = BytesIO()
-        qr.save(buffer, format="PNG")
-
-        # Clean the facility name to be filename-safe
-        safe_name = self.name.lower().replace(' ', '_')
-        filename = f"{safe_name}_qr_{self.uuid}.png"
+    def generate_qr_code(self):
+        """Render the facility's QR code, reusing a stored image of the same payload."""
+        payload = self.qr_payload
+        digest = payload_hash(payload)
+        self.qr_code.name = store_qr_image(payload, digest)
+        self.qr_payload_hash = digest
 
-        self.qr_code.save(filename, ContentFile(buffer.getvalue()), save=False)
+class AccessLogManager(models.Manager):
+    def bulk_log(self, logs):
+        """Insert access logs in one query, firing post_save for each row like create() does.
 
-    def save(self, *args, **kwargs):
-        if not self.pk:
-            super().save(*args, **kwargs)
-        self.generate_qr_code()
-        super().save(update_fields=['qr_code'])
+        Only the insert can raise. The rows are committed by then, so a failing
+        receiver is logged and skipped rather than failing the batch. Rollups
+        are counted here per bucket, and receivers get ``rollup_recorded=True``.
+        """
+        # bulk_create skips pre_save, so snapshot the admin flag here in one query
+        admin_ids = set(get_user_model().objects.filter(
+            pk__in={log.user_id for log in logs}, is_admin=True
+        ).values_list('pk', flat=True))
+        for log in logs:
+            log.user_is_admin = log.user_id in admin_ids
+        logs = self.bulk_create(logs)
+        try:
+            AccessLogRollup.objects.record_many(logs)
+        except DatabaseError as e:
+            logger.error(f"Rollup update for {len(logs)} access logs failed, run rebuild_access_rollups: {e}")
+        for log in logs:
+            responses = post_save.send_robust(
+                sender=self.model, instance=log, created=True,
+                update_fields=None, raw=False, using=self.db, rollup_recorded=True
+            )
+            for receiver, response in responses:
+                if isinstance(response, Exception):
+                    logger.error(f"post_save receiver {getattr(receiver, '__name__', receiver)} failed for access log {log.id}: {response}")
+        return logs
 
 class AccessLog(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     facility = models.ForeignKey(Facility, on_delete=models.CASCADE)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)  # Set at scan time, not insert time
     status = models.CharField(max_length=10, choices=[('success', 'Success'), ('failed', 'Failed')])
     reason = models.TextField(blank=True, null=True)
     user_tier_at_time = models.CharField(
@@ -63,6 +84,10 @@ class AccessLog(models.Model):
         ('admin', 'Admin Override')
     ], default='qr')
     location = models.CharField(max_length=255, blank=True, null=True)  # Optional: GPS coordinates if available
+    direction = models.CharField(max_length=3, choices=[('in', 'Check-in'), ('out', 'Check-out')], default='in')
+    user_is_admin = models.BooleanField(default=False, editable=False)  # Store whether the user was an admin when scanning
+
+    objects = AccessLogManager()
 
     class Meta:
         ordering = ['-timestamp']
@@ -71,4 +96,74 @@ class AccessLog(models.Model):
             models.Index(fields=['facility']),
             models.Index(fields=['user']),
             models.Index(fields=['status']),
+            # Date-range queries per facility / per member
+            models.Index(fields=['facility', 'timestamp']),
+            models.Index(fields=['user', 'timestamp']),
+        ]
+
+
+class AccessLogRollupManager(models.Manager):
+    @staticmethod
+    def bucket(log):
+        return (
+            ('facility_id', log.facility_id),
+            ('hour', log.timestamp.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)),
+            ('status', log.status),
+            ('user_tier_at_time', log.user_tier_at_time),
+            ('scan_method', log.scan_method),
+            ('user_is_admin', log.user_is_admin),
+        )
+
+    def add(self, bucket, count):
+        key = dict(bucket)
+        if self.filter(**key).update(count=F('count') + count):
+            return
+        try:
+            with transaction.atomic():
+                self.create(count=count, **key)
+        except IntegrityError:
+            # Another writer created the bucket first
+            self.filter(**key).update(count=F('count') + count)
+
+    def record(self, log):
+        """Count one AccessLog in its hourly bucket."""
+        self.add(self.bucket(log), 1)
+
+    def record_many(self, logs):
+        """Count a batch of AccessLogs with one write per hourly bucket instead of per row."""
+        # Check-outs aren't access attempts, so they stay out of the scan statistics
+        deltas = Counter(self.bucket(log) for log in logs if log.direction != 'out')
+        for bucket, count in deltas.items():
+            self.add(bucket, count)
+
+    def discard(self, log):
+        """Uncount a deleted AccessLog."""
+        self.filter(count__gt=0, **dict(self.bucket(log))).update(count=F('count') - 1)
+
+class AccessLogRollup(models.Model):
+    """AccessLog check-in counts per facility, UTC hour, status, tier and scan method.
+
+    Maintained incrementally as logs are written and deleted; rebuild from
+    scratch with `python manage.py rebuild_access_rollups`. Like the tier, the
+    admin flag is the one the log stored at scan time.
+    """
+    facility = models.ForeignKey(Facility, on_delete=models.CASCADE, related_name='access_rollups')
+    hour = models.DateTimeField()
+    status = models.CharField(max_length=10, choices=[('success', 'Success'), ('failed', 'Failed')])
+    user_tier_at_time = models.CharField(max_length=10, blank=True, null=True)
+    scan_method = models.CharField(max_length=20)
+    user_is_admin = models.BooleanField(default=False)  # Admin scans are left out of summaries
+    count = models.PositiveIntegerField(default=0)
+
+    objects = AccessLogRollupManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['facility', 'hour', 'status', 'user_tier_at_time', 'scan_method', 'user_is_admin'],
+                name='unique_access_log_rollup_bucket'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['hour']),
         ]
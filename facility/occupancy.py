@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import AccessLog
+
+
+def _count_key(facility_id):
+    return f'facility:occupancy:{facility_id}'
+
+
+def _presence_key(facility_id, user_id):
+    return f'facility:present:{facility_id}:{user_id}'
+
+
+def check_in(facility_id, user_id):
+    # The presence marker makes repeated check-ins without a check-out count once
+    if not cache.add(_presence_key(facility_id, user_id), 1, timeout=settings.OCCUPANCY_MAX_STAY.total_seconds()):
+        return
+    try:
+        cache.incr(_count_key(facility_id))
+    except ValueError:
+        cache.add(_count_key(facility_id), 0, timeout=None)
+        cache.incr(_count_key(facility_id))
+
+
+def check_out(facility_id, user_id):
+    if not cache.delete(_presence_key(facility_id, user_id)):
+        return
+    try:
+        cache.decr(_count_key(facility_id))
+    except ValueError:
+        pass
+
+
+def get_occupancy(facility_ids):
+    """Return {facility_id: headcount} from the cache counters."""
+    counts = cache.get_many([_count_key(facility_id) for facility_id in facility_ids])
+    return {
+        facility_id: max(0, counts.get(_count_key(facility_id), 0))
+        for facility_id in facility_ids
+    }
+
+
+def compute_occupancy():
+    """Count members whose latest successful scan per facility is a recent check-in."""
+    since = timezone.now() - settings.OCCUPANCY_MAX_STAY
+    recent = AccessLog.objects.filter(status='success', timestamp__gte=since)
+    latest = recent.filter(
+        user=OuterRef('user'), facility=OuterRef('facility')
+    ).order_by('-timestamp', '-id').values('id')[:1]
+
+    present = (
+        recent.filter(direction='in', id=Subquery(latest))
+        .values('facility_id')
+        .annotate(count=Count('id'))
+        .order_by()
+    )
+    return {row['facility_id']: row['count'] for row in present}
+
+
+def reconcile(facility_ids):
+    """Overwrite the cache counters with the headcount computed from the database."""
+    counts = compute_occupancy()
+    cache.set_many({_count_key(facility_id): counts.get(facility_id, 0) for facility_id in facility_ids}, timeout=None)
+    return counts
@@ -0,0 +1,103 @@
+import base64
+import hmac
+import struct
+from datetime import date, datetime, timezone as dt_timezone
+from typing import NamedTuple, Optional
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+from .access import decide_access
+from .entitlements import TIER_CODES, TIER_NAMES
+
+PASS_VERSION = 1
+KEY_SALT = 'facility.passes.AccessPass'
+MAC_SIZE = 16
+
+# version, flags, tier code, user id, membership start/end ordinals, expiry (epoch seconds)
+PAYLOAD = struct.Struct('<BBBIiiI')
+
+FLAG_TRAINER = 0x01
+
+
+class InvalidAccessPass(Exception):
+    pass
+
+
+class AccessPass(NamedTuple):
+    user_id: int
+    is_trainer: bool
+    type_of_membership: Optional[str]
+    membership_start_date: Optional[date]
+    membership_end_date: Optional[date]
+    expires_at: datetime
+
+    def decide(self, required_tier, on_date):
+        return decide_access(
+            self.is_trainer,
+            self.type_of_membership,
+            self.membership_start_date,
+            self.membership_end_date,
+            required_tier,
+            on_date
+        )
+
+
+def _mac(payload):
+    return salted_hmac(KEY_SALT, payload, algorithm='sha256').digest()[:MAC_SIZE]
+
+
+def issue_access_pass(user, lifetime=None):
+    """Return a compact signed pass for ``user`` and the time it expires."""
+    lifetime = lifetime or settings.ACCESS_PASS_LIFETIME
+    expires_at = (timezone.now() + lifetime).replace(microsecond=0)
+    start = user.membership_start_date.toordinal() if user.membership_start_date else 0
+    end = user.membership_end_date.toordinal() if user.membership_end_date else 0
+
+    payload = PAYLOAD.pack(
+        PASS_VERSION,
+        FLAG_TRAINER if user.is_trainer else 0,
+        TIER_CODES.get(user.type_of_membership, 0),
+        user.id,
+        start,
+        end,
+        int(expires_at.timestamp())
+    )
+    token = base64.urlsafe_b64encode(payload + _mac(payload)).rstrip(b'=').decode('ascii')
+    return token, expires_at
+
+
+def verify_access_pass(token, at=None):
+    """Check a pass signature and expiry without touching the database.
+
+    ``at`` is the moment the pass was presented; it defaults to now, and
+    reconciliation passes the original scan time.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+    except (TypeError, ValueError):
+        raise InvalidAccessPass("Malformed access pass")
+    if len(raw) != PAYLOAD.size + MAC_SIZE:
+        raise InvalidAccessPass("Malformed access pass")
+
+    payload, mac = raw[:PAYLOAD.size], raw[PAYLOAD.size:]
+    if not hmac.compare_digest(mac, _mac(payload)):
+        raise InvalidAccessPass("Invalid access pass signature")
+
+    version, flags, tier, user_id, start, end, expires = PAYLOAD.unpack(payload)
+    if version != PASS_VERSION:
+        raise InvalidAccessPass("Unsupported access pass version")
+
+    expires_at = datetime.fromtimestamp(expires, tz=dt_timezone.utc)
+    if (at or timezone.now()) > expires_at:
+        raise InvalidAccessPass("Access pass has expired")
+
+    return AccessPass(
+        user_id=user_id,
+        is_trainer=bool(flags & FLAG_TRAINER),
+        type_of_membership=TIER_NAMES.get(tier),
+        membership_start_date=date.fromordinal(start) if start else None,
+        membership_end_date=date.fromordinal(end) if end else None,
+        expires_at=expires_at
+    )
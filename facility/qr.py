@@ -0,0 +1,129 @@
+import base64
+import binascii
+import hashlib
+import json
+import os
+import re
+import tempfile
+import uuid
+from functools import lru_cache
+from io import BytesIO
+
+import qrcode
+import qrcode.image.svg
+from PIL import Image
+from django.core.files.storage import default_storage
+
+# "F1:" + base32 UUID uses only characters from the QR alphanumeric set, so the
+# whole payload is encoded in alphanumeric mode and fits a version 2 symbol.
+PAYLOAD_PREFIX = 'F1:'
+
+
+def encode_payload(facility_uuid):
+    """Return the compact QR payload for a facility UUID."""
+    encoded = base64.b32encode(uuid.UUID(str(facility_uuid)).bytes).decode('ascii').rstrip('=')
+    return f"{PAYLOAD_PREFIX}{encoded}"
+
+
+def parse_payload(qr_code_data):
+    """Return the facility UUID in scanned QR data, raising ValueError if invalid.
+
+    Accepts the compact ``F1:`` format and the legacy JSON document
+    (``{"uuid": ..., "name": ..., "required_tier": ...}``) printed before it.
+    """
+    if not isinstance(qr_code_data, str):
+        raise ValueError("Invalid QR code format")
+    data = qr_code_data.strip()
+
+    if data[:len(PAYLOAD_PREFIX)].upper() == PAYLOAD_PREFIX:
+        encoded = data[len(PAYLOAD_PREFIX):].upper()
+        try:
+            return uuid.UUID(bytes=base64.b32decode(encoded + '=' * (-len(encoded) % 8)))
+        except (binascii.Error, ValueError) as e:
+            raise ValueError("Invalid QR code format") from e
+
+    # Legacy JSON payload
+    try:
+        facility_uuid = json.loads(data).get("uuid")
+        if not facility_uuid:
+            raise ValueError("Missing UUID")
+        return uuid.UUID(str(facility_uuid))
+    except (json.JSONDecodeError, AttributeError, TypeError) as e:
+        raise ValueError("Invalid QR code format") from e
+
+
+def payload_hash(payload):
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def render_png(payload):
+    """Render a QR code PNG for ``payload`` and return its bytes."""
+    buffer = BytesIO()
+    qrcode.make(payload).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+QR_BORDER = 4
+QR_FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+
+@lru_cache(maxsize=256)
+def render_qr(payload, image_format='png', size=512):
+    """Render ``payload`` as a ``size`` pixel PNG or SVG, keeping the last 256 renders.
+
+    PNG modules are scaled by a whole number of pixels and centred on the canvas
+    so every module stays the same width, which keeps small renders scannable.
+    """
+    qr = qrcode.QRCode(border=QR_BORDER)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    buffer = BytesIO()
+
+    if image_format == 'svg':
+        qr.make_image(image_factory=qrcode.image.svg.SvgPathImage).save(buffer)
+        return re.sub(
+            rb'width="[^"]*" height="[^"]*"',
+            f'width="{size}" height="{size}"'.encode('ascii'),
+            buffer.getvalue(),
+            count=1
+        )
+
+    modules = qr.modules_count + 2 * QR_BORDER
+    qr.box_size = max(1, size // modules)
+    image = qr.make_image().get_image().convert('L')
+    canvas = Image.new('L', (max(size, image.width), max(size, image.height)), 255)
+    canvas.paste(image, ((canvas.width - image.width) // 2, (canvas.height - image.height) // 2))
+    canvas.save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def write_atomic(path, data):
+    """Write ``data`` to ``path`` via a temp file and rename, so readers never see a partial PNG."""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def qr_image_name(digest):
+    return f"qrcodes/{digest}.png"
+
+
+def store_qr_image(payload, digest=None):
+    """Store the PNG for ``payload`` once, named by its hash, and return its storage name.
+
+    Facilities with identical payloads share one file instead of writing a new
+    PNG on every render.
+    """
+    digest = digest or payload_hash(payload)
+    name = qr_image_name(digest)
+    if not default_storage.exists(name):
+        write_atomic(default_storage.path(name), render_png(payload))
+    return name
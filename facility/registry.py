@@ -0,0 +1,92 @@
+import logging
+import threading
+import time
+import uuid
+
+from django.core.cache import cache
+
+from .models import Facility
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'facility:registry:version'
+
+
+class FacilityRegistry:
+    """Process-local facility lookup keyed by UUID.
+
+    Each worker keeps its own copy of the facility table and compares it with a
+    version counter held in the shared cache. Saving or deleting a facility bumps
+    the counter, so every worker reloads before serving its next lookup. While
+    the cache is unreachable, workers keep serving the copy they already hold.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._facilities = {}
+        self._version = None
+        self._loaded = False
+
+    def current_version(self):
+        """Return the shared version, or None if the cache can't be reached."""
+        # Seed with a timestamp rather than 1 so that a counter lost to eviction
+        # or a cache restart never matches a version a worker already holds.
+        try:
+            return cache.get_or_set(VERSION_KEY, time.time_ns, timeout=None)
+        except Exception as e:
+            logger.warning(f"Could not read facility registry version: {e}")
+            return None
+
+    def load(self, version=None):
+        """Reload every facility from the database."""
+        if version is None:
+            version = self.current_version()
+        facilities = {str(facility.uuid): facility for facility in Facility.objects.all()}
+        with self._lock:
+            self._facilities = facilities
+            self._version = version
+            self._loaded = True
+
+    def warm(self):
+        """Populate the registry at worker startup, tolerating an unmigrated DB."""
+        try:
+            self.load()
+        except Exception as e:
+            logger.warning(f"Could not warm facility registry: {e}")
+
+    def invalidate(self):
+        """Bump the shared version so every worker reloads on its next lookup."""
+        try:
+            try:
+                cache.incr(VERSION_KEY)
+            except ValueError:
+                cache.set(VERSION_KEY, time.time_ns(), timeout=None)
+        except Exception as e:
+            # Workers pick the change up once the cache is back and the version moves
+            logger.error(f"Could not invalidate facility registry: {e}")
+
+    def _ensure_fresh(self):
+        version = self.current_version()
+        if version is None:
+            # Cache down: serve the loaded copy rather than fail the scan
+            if not self._loaded:
+                self.load(version)
+            return
+        if version != self._version:
+            self.load(version)
+
+    def get(self, facility_uuid):
+        """Return the facility with the given UUID, or None if there is none."""
+        try:
+            key = str(uuid.UUID(str(facility_uuid)))
+        except ValueError:
+            return None
+        self._ensure_fresh()
+        return self._facilities.get(key)
+
+    def all(self):
+        self._ensure_fresh()
+        return list(self._facilities.values())
+
+
+facility_registry = FacilityRegistry()
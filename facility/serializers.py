@@ -5,6 +5,20 @@ from django.utils.timezone import now
 class QRScanSerializer(serializers.Serializer):
     facility_id = serializers.IntegerField()  # Pass facility ID with the QR scan data
 
+class ScanRecordSerializer(serializers.Serializer):
+    user_id = serializers.IntegerField(required=False)
+    access_pass = serializers.CharField(required=False)  # Offline pass presented instead of a user id
+    facility_uuid = serializers.UUIDField()
+    timestamp = serializers.DateTimeField()
+    scan_method = serializers.ChoiceField(choices=AccessLog._meta.get_field('scan_method').choices, default='qr')
+    location = serializers.CharField(max_length=255, required=False, allow_blank=True, allow_null=True)
+    direction = serializers.ChoiceField(choices=AccessLog._meta.get_field('direction').choices, default='in')
+
+    def validate(self, data):
+        if not data.get('user_id') and not data.get('access_pass'):
+            raise serializers.ValidationError("Either user_id or access_pass is required")
+        return data
+
 class AccessLogSerializer(serializers.ModelSerializer):
     user_name = serializers.CharField(source='user.full_name', read_only=True)
     user_email = serializers.CharField(source='user.email', read_only=True)
@@ -25,5 +39,6 @@ class AccessLogSerializer(serializers.ModelSerializer):
             'status', 
             'reason',
             'scan_method',
-            'location'
+            'location',
+            'direction'
         ]
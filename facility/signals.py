@@ -0,0 +1,86 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from account.models import CustomUser
+from .models import Facility, AccessLog, AccessLogRollup
+from .registry import facility_registry
+from .entitlements import entitlement_table
+from .qr import payload_hash
+from .tasks import render_facility_qr
+from . import occupancy
+from django.conf import settings
+from django.utils import timezone
+import logging
+
+logger = logging.getLogger(__name__)
+
+@receiver(post_save, sender=Facility)
+@receiver(post_delete, sender=Facility)
+def invalidate_facility_registry(sender, instance, **kwargs):
+    # Wait for the commit so other workers never reload the old row
+    transaction.on_commit(facility_registry.invalidate)
+
+@receiver(post_save, sender=Facility)
+def schedule_qr_render(sender, instance, raw=False, **kwargs):
+    # Only re-render when the encoded payload changed, not on every save
+    if raw or (instance.qr_code and instance.qr_payload_hash == payload_hash(instance.qr_payload)):
+        return
+    facility_id = instance.pk
+    transaction.on_commit(lambda: _enqueue_qr_render(facility_id))
+
+def _enqueue_qr_render(facility_id):
+    try:
+        render_facility_qr.delay(facility_id)
+    except Exception as e:
+        logger.warning(f"Could not queue QR render for facility {facility_id}, rendering inline: {e}")
+        render_facility_qr(facility_id)
+
+@receiver(post_save, sender=CustomUser)
+def update_entitlement(sender, instance, **kwargs):
+    transaction.on_commit(lambda: entitlement_table.update(instance))
+
+@receiver(post_delete, sender=CustomUser)
+def remove_entitlement(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: entitlement_table.remove(user_id))
+
+def _user_is_admin(user_id):
+    entitlement = entitlement_table.get(user_id)
+    if entitlement is not None:
+        return entitlement.is_admin
+    return CustomUser.objects.filter(pk=user_id, is_admin=True).exists()
+
+@receiver(pre_save, sender=AccessLog)
+def snapshot_user_is_admin(sender, instance, raw=False, **kwargs):
+    if instance._state.adding and not raw:
+        instance.user_is_admin = _user_is_admin(instance.user_id)
+
+@receiver(post_save, sender=AccessLog)
+def update_access_rollup(sender, instance, created, rollup_recorded=False, **kwargs):
+    # Check-outs aren't access attempts, so they stay out of the scan statistics;
+    # bulk_log counts its rows per bucket itself
+    if created and not rollup_recorded and instance.direction != 'out':
+        AccessLogRollup.objects.record(instance)
+
+@receiver(post_delete, sender=AccessLog)
+def discard_access_rollup(sender, instance, **kwargs):
+    # Also runs for logs cascading from a deleted member or facility
+    if instance.direction != 'out':
+        AccessLogRollup.objects.discard(instance)
+
+@receiver(post_save, sender=AccessLog)
+def update_occupancy(sender, instance, created, **kwargs):
+    # Replayed scans older than a visit can't change who is inside now
+    if not created or instance.status != 'success':
+        return
+    if instance.timestamp < timezone.now() - settings.OCCUPANCY_MAX_STAY:
+        return
+    # The log is already written; a cache outage must not fail the scan (the
+    # door would retry and log it twice). reconcile_occupancy repairs the counts.
+    try:
+        if instance.direction == 'out':
+            occupancy.check_out(instance.facility_id, instance.user_id)
+        else:
+            occupancy.check_in(instance.facility_id, instance.user_id)
+    except Exception as e:
+        logger.error(f"Could not update occupancy for facility {instance.facility_id}: {e}")
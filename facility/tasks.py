@@ -0,0 +1,33 @@
+from celery import shared_task
+from .models import Facility
+from .qr import payload_hash
+from .registry import facility_registry
+from . import occupancy
+import logging
+
+logger = logging.getLogger(__name__)
+
+@shared_task
+def render_facility_qr(facility_id):
+    """Render a facility's QR code if its payload changed since the last render."""
+    facility = Facility.objects.filter(pk=facility_id).first()
+    if facility is None:
+        return
+    if facility.qr_code and facility.qr_payload_hash == payload_hash(facility.qr_payload):
+        return
+
+    facility.generate_qr_code()
+    # update() rather than save() so this doesn't schedule another render
+    Facility.objects.filter(pk=facility_id).update(
+        qr_code=facility.qr_code.name,
+        qr_payload_hash=facility.qr_payload_hash
+    )
+    facility_registry.invalidate()
+    logger.info(f"Rendered QR code for facility {facility_id}: {facility.qr_code.name}")
+
+@shared_task
+def reconcile_occupancy():
+    """Reset the cached occupancy counters from the access logs."""
+    facility_ids = list(Facility.objects.values_list('id', flat=True))
+    counts = occupancy.reconcile(facility_ids)
+    logger.info(f"Reconciled occupancy for {len(facility_ids)} facilities: {counts}")
@@ -5,6 +5,12 @@ urlpatterns = [
     path('qr-scan/', QRScanView.as_view(), name='qr-scan'),
     path('my-access-logs/', UserAccessLogsView.as_view(), name='user-access-logs'),
     path('scan/', QRScanView.as_view(), name='facility-scan'),
+    path('scan/bulk/', BulkScanIngestView.as_view(), name='facility-scan-bulk'),
+    path('access-pass/', AccessPassView.as_view(), name='access-pass'),
+    path('access-pass/scan/', AccessPassScanView.as_view(), name='access-pass-scan'),
+    path('<uuid:facility_uuid>/qr/', FacilityQRCodeView.as_view(), name='facility-qr-code'),
+    path('occupancy/', FacilityOccupancyView.as_view(), name='facility-occupancy'),
     path('logs/', UserAccessLogsView.as_view(), name='user-access-logs'),
+    path('logs/export/', AccessLogExportView.as_view(), name='access-log-export'),
     path('reports/user-history/', UserAccessHistoryView.as_view(), name='user-access-history'),
 ]
@@ -0,0 +1,42 @@
+from datetime import datetime, time, timedelta
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+
+def _parse(value, param):
+    if not value:
+        return None
+    try:
+        parsed = parse_date(str(value))
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({param: 'Invalid date, expected YYYY-MM-DD'})
+    return parsed
+
+
+def date_range_bounds(start_date=None, end_date=None):
+    """Turn inclusive start/end date params into aware, half-open datetime bounds.
+
+    Returns ``(start, end)`` where either may be None, for filtering with
+    ``field__gte=start`` and ``field__lt=end``. Unlike ``field__date__gte``
+    these compare the raw column, so an index on it can be used.
+    """
+    start = _parse(start_date, 'start_date')
+    end = _parse(end_date, 'end_date')
+    tz = timezone.get_current_timezone()
+    return (
+        timezone.make_aware(datetime.combine(start, time.min), tz) if start else None,
+        timezone.make_aware(datetime.combine(end + timedelta(days=1), time.min), tz) if end else None,
+    )
+
+
+def filter_date_range(queryset, start_date=None, end_date=None, field='timestamp'):
+    """Filter ``queryset`` to rows whose ``field`` falls on start_date..end_date inclusive."""
+    start, end = date_range_bounds(start_date, end_date)
+    if start:
+        queryset = queryset.filter(**{f'{field}__gte': start})
+    if end:
+        queryset = queryset.filter(**{f'{field}__lt': end})
+    return queryset
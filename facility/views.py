@@ -2,14 +2,31 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework import generics
-from .models import Facility, AccessLog
-from .serializers import QRScanSerializer, AccessLogSerializer
+from .models import AccessLog
+from .serializers import QRScanSerializer, AccessLogSerializer, ScanRecordSerializer
+from .registry import facility_registry
+from .utils import filter_date_range
+from .pagination import AccessLogCursorPagination
+from .buffer import record_access
+from .access import decide_access, decide_check_out
+from .occupancy import get_occupancy
+from .authentication import ScanJWTAuthentication
+from .qr import parse_payload, payload_hash, render_qr, QR_FORMATS
+from .passes import issue_access_pass, verify_access_pass, InvalidAccessPass
+from account.models import CustomUser
 from datetime import date
 from django.utils.timezone import now
-import json
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.http import HttpResponse, StreamingHttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+import csv
+import hashlib
+import json
 
 class QRScanView(APIView):
+    # Decides from the entitlement table instead of loading the CustomUser row
+    authentication_classes = [ScanJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def post(self, request):
@@ -17,36 +34,64 @@ class QRScanView(APIView):
         qr_code_data = request.data.get("qrCode", None)
         scan_method = request.data.get("scan_method", "qr")
         location = request.data.get("location", None)
+        direction = request.data.get("direction", "in")
 
+        if direction not in ('in', 'out'):
+            return Response({'error': 'direction must be "in" or "out"'}, status=400)
         if not qr_code_data:
             return Response({'error': 'QR Code data is missing'}, status=400)
 
         try:
-            qr_data = json.loads(qr_code_data)
-            facility_uuid = qr_data.get("uuid")
-            if not facility_uuid:
-                raise ValueError("Missing UUID")
-        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+            facility_uuid = parse_payload(qr_code_data)
+        except ValueError:
             return Response({'error': 'Invalid QR code format'}, status=400)
 
         user = request.user
 
         # Validate facility existence
-        try:
-            facility = Facility.objects.get(uuid=facility_uuid)
-        except Facility.DoesNotExist:
+        facility = facility_registry.get(facility_uuid)
+        if facility is None:
             return Response({'error': 'Facility not found'}, status=404)
 
-        # ✅ Trainer override: allow access regardless of membership
-        if user.is_trainer:
-            AccessLog.objects.create(
-                user=user,
+        if direction == 'out':
+            decision = decide_check_out(user.is_trainer, user.type_of_membership)
+            record_access(
+                user_id=user.id,
                 facility=facility,
-                status='success',
-                user_tier_at_time='trainer',
+                status=decision.status,
+                user_tier_at_time=decision.user_tier,
                 scan_method=scan_method,
-                location=location
+                location=location,
+                direction='out'
             )
+            return Response({
+                'status': 'success',
+                'direction': 'out',
+                'facility_name': facility.name,
+                'timestamp': timezone.now().isoformat(),
+                'message': 'Checked out'
+            })
+
+        decision = decide_access(
+            user.is_trainer,
+            user.type_of_membership,
+            user.membership_start_date,
+            user.membership_end_date,
+            facility.required_tier,
+            timezone.localdate()
+        )
+        record_access(
+            user_id=user.id,
+            facility=facility,
+            status=decision.status,
+            reason=decision.reason,
+            user_tier_at_time=decision.user_tier,
+            scan_method=scan_method,
+            location=location
+        )
+
+        # ✅ Trainer override: allow access regardless of membership
+        if decision.user_tier == 'trainer':
             return Response({
                 'status': 'success',
                 'user_name': user.full_name,
@@ -58,86 +103,324 @@ class QRScanView(APIView):
                 'message': 'Access granted (Trainer)'
             })
 
-        # Check if user's membership is active
-        if not user.is_membership_active:
-            reason = "Inactive membership"
-            AccessLog.objects.create(
-                user=user,
-                facility=facility,
-                status='failed',
-                reason=reason,
-                user_tier_at_time=user.type_of_membership,
-                scan_method=scan_method,
-                location=location
-            )
+        if decision.status == 'failed':
+            if decision.reason == "Inactive membership":
+                return Response({
+                    'status': 'failed',
+                    'reason': decision.reason,
+                    'message': 'Access denied. Your membership is inactive. Please renew your membership.'
+                }, status=403)
             return Response({
                 'status': 'failed',
-                'reason': reason,
-                'message': 'Access denied. Your membership is inactive. Please renew your membership.'
+                'reason': decision.reason,
+                'required_tier': facility.required_tier,
+                'user_tier': decision.user_tier,
+                'message': 'Access denied. Admins have been notified.'
             }, status=403)
 
-        # Check tier access
-        user_tier = user.type_of_membership
-        required_tier = facility.required_tier
+        return Response({
+            'status': 'success',
+            'user_name': user.full_name,
+            'user_tier': decision.user_tier,
+            'facility_name': facility.name,
+            'facility_tier': facility.required_tier,
+            'timestamp': timezone.now().isoformat(),
+            'access_granted': True
+        })
+
+class BulkScanIngestView(APIView):
+    """Replay scans buffered by door controllers while they were offline."""
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    max_records = 1000
+
+    def post(self, request):
+        records = request.data.get("records")
+        if not isinstance(records, list) or not records:
+            return Response({'error': 'records must be a non-empty list'}, status=400)
+        if len(records) > self.max_records:
+            return Response({'error': f'At most {self.max_records} records per request'}, status=400)
+
+        results = [None] * len(records)
+        valid = []
+        for index, record in enumerate(records):
+            serializer = ScanRecordSerializer(data=record)
+            if serializer.is_valid():
+                valid.append((index, serializer.validated_data))
+            else:
+                results[index] = {'index': index, 'status': 'rejected', 'errors': serializer.errors}
 
-        # Define tier hierarchy
-        tier_hierarchy = {
-            'tier1': 1,
-            'tier2': 2,
-            'tier3': 3
+        # Offline passes are verified locally and carry their own entitlements
+        passes = {}
+        verified = []
+        for index, data in valid:
+            if data.get('access_pass'):
+                try:
+                    passes[index] = verify_access_pass(data['access_pass'], at=data['timestamp'])
+                except InvalidAccessPass as e:
+                    results[index] = {'index': index, 'status': 'rejected', 'errors': str(e)}
+                    continue
+                data['user_id'] = passes[index].user_id
+            verified.append((index, data))
+        valid = verified
+
+        # One query for every member referenced in the batch
+        user_ids = {data['user_id'] for _, data in valid}
+        members = {
+            member['id']: member
+            for member in CustomUser.objects.filter(id__in=user_ids).values(
+                'id', 'is_trainer', 'type_of_membership', 'membership_start_date', 'membership_end_date'
+            )
         }
 
-        # Check if user's tier is at least as high as required tier
-        if tier_hierarchy[user_tier] < tier_hierarchy[required_tier]:
-            reason = f"Required tier is {required_tier}, but your tier is {user_tier}"
-            AccessLog.objects.create(
-                user=user,
+        logs = []
+        logged_indexes = []
+        for index, data in valid:
+            member = members.get(data['user_id'])
+            facility = facility_registry.get(data['facility_uuid'])
+            if member is None or facility is None:
+                error = 'User not found' if member is None else 'Facility not found'
+                results[index] = {'index': index, 'status': 'rejected', 'errors': error}
+                continue
+
+            # Judge each scan by the membership dates on the day it happened
+            scan_date = timezone.localdate(data['timestamp'])
+            if data['direction'] == 'out':
+                is_trainer = passes[index].is_trainer if index in passes else member['is_trainer']
+                decision = decide_check_out(is_trainer, member['type_of_membership'])
+            elif index in passes:
+                decision = passes[index].decide(facility.required_tier, scan_date)
+            else:
+                decision = decide_access(
+                    member['is_trainer'],
+                    member['type_of_membership'],
+                    member['membership_start_date'],
+                    member['membership_end_date'],
+                    facility.required_tier,
+                    scan_date
+                )
+            logs.append(AccessLog(
+                user_id=member['id'],
                 facility=facility,
-                status='failed',
-                reason=reason,
-                user_tier_at_time=user_tier,
-                scan_method=scan_method,
-                location=location
-            )
+                timestamp=data['timestamp'],
+                status=decision.status,
+                reason=decision.reason,
+                user_tier_at_time=decision.user_tier,
+                scan_method=data['scan_method'],
+                location=data.get('location'),
+                direction=data['direction']
+            ))
+            logged_indexes.append(index)
+            results[index] = {
+                'index': index,
+                'status': decision.status,
+                'reason': decision.reason,
+                'access_granted': decision.status == 'success'
+            }
+
+        for index, log in zip(logged_indexes, AccessLog.objects.bulk_log(logs)):
+            results[index]['access_log_id'] = log.id
+
+        return Response({
+            'received': len(records),
+            'logged': len(logs),
+            'results': results
+        })
+
+class AccessPassView(APIView):
+    """Issue a short-lived signed pass the member's phone renders as a QR code."""
+    authentication_classes = [ScanJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = request.user
+        if not user.is_trainer and not user.is_membership_active:
             return Response({
-                'status': 'failed',
-                'reason': reason,
-                'required_tier': required_tier,
-                'user_tier': user_tier,
-                'message': 'Access denied. Admins have been notified.'
+                'error': 'Access passes are only issued for active memberships'
             }, status=403)
 
-        # Log successful access
-        AccessLog.objects.create(
-            user=user,
+        token, expires_at = issue_access_pass(user)
+        return Response({
+            'access_pass': token,
+            'expires_at': expires_at.isoformat()
+        })
+
+class AccessPassScanView(APIView):
+    """Check a member's access pass at a door without reading the database."""
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def post(self, request):
+        token = request.data.get("access_pass")
+        qr_code_data = request.data.get("qrCode")
+        direction = request.data.get("direction", "in")
+        if direction not in ('in', 'out'):
+            return Response({'error': 'direction must be "in" or "out"'}, status=400)
+        if not token or not qr_code_data:
+            return Response({'error': 'access_pass and qrCode are required'}, status=400)
+
+        try:
+            facility = facility_registry.get(parse_payload(qr_code_data))
+        except ValueError:
+            return Response({'error': 'Invalid QR code format'}, status=400)
+        if facility is None:
+            return Response({'error': 'Facility not found'}, status=404)
+
+        try:
+            access_pass = verify_access_pass(token)
+        except InvalidAccessPass as e:
+            return Response({'status': 'failed', 'reason': str(e)}, status=403)
+
+        if direction == 'out':
+            decision = decide_check_out(access_pass.is_trainer, access_pass.type_of_membership)
+        else:
+            decision = access_pass.decide(facility.required_tier, timezone.localdate())
+        record_access(
+            user_id=access_pass.user_id,
             facility=facility,
-            status='success',
-            user_tier_at_time=user_tier,
-            scan_method=scan_method,
-            location=location
+            status=decision.status,
+            reason=decision.reason,
+            user_tier_at_time=decision.user_tier,
+            scan_method=request.data.get("scan_method", "qr"),
+            location=request.data.get("location"),
+            direction=direction
         )
-
         return Response({
-            'status': 'success',
-            'user_name': user.full_name,
-            'user_tier': user_tier,
+            'status': decision.status,
+            'reason': decision.reason,
+            'user_tier': decision.user_tier,
             'facility_name': facility.name,
-            'facility_tier': required_tier,
-            'timestamp': timezone.now().isoformat(),
-            'access_granted': True
-        })
+            'facility_tier': facility.required_tier,
+            'access_granted': decision.status == 'success'
+        }, status=200 if decision.status == 'success' else 403)
+
+class FacilityQRCodeView(APIView):
+    """Render a facility's QR code on demand as PNG or SVG at a requested size."""
+    permission_classes = [IsAuthenticated]
+    min_size = 64
+    max_size = 2048
+    default_size = 512
+    max_age = 60 * 60 * 24
+
+    def perform_content_negotiation(self, request, force=False):
+        # ?format=png|svg selects the image type, not a DRF renderer
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, facility_uuid):
+        facility = facility_registry.get(facility_uuid)
+        if facility is None:
+            return Response({'error': 'Facility not found'}, status=404)
+
+        image_format = request.query_params.get('format', 'png').lower()
+        if image_format not in QR_FORMATS:
+            return Response({'error': 'format must be one of: ' + ', '.join(QR_FORMATS)}, status=400)
+        try:
+            size = int(request.query_params.get('size', self.default_size))
+        except ValueError:
+            return Response({'error': 'size must be an integer'}, status=400)
+        size = min(max(size, self.min_size), self.max_size)
+
+        # Renders are deterministic, so the ETag can be derived without rendering
+        payload = facility.qr_payload
+        etag = '"%s"' % hashlib.sha256(
+            f"{payload_hash(payload)}:{image_format}:{size}".encode('utf-8')
+        ).hexdigest()[:32]
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(render_qr(payload, image_format, size), content_type=QR_FORMATS[image_format])
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=self.max_age)
+        return response
+
+class FacilityOccupancyView(APIView):
+    """Live headcount per facility, cheap enough for every member's app to poll."""
+    authentication_classes = [ScanJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    max_age = 5
+
+    def get(self, request):
+        facilities = facility_registry.all()
+        counts = get_occupancy([facility.id for facility in facilities])
+        response = Response([
+            {
+                'facility_id': facility.id,
+                'facility_uuid': str(facility.uuid),
+                'facility_name': facility.name,
+                'occupancy': counts[facility.id]
+            }
+            for facility in facilities
+        ])
+        patch_cache_control(response, private=True, max_age=self.max_age)
+        return response
+
+class Echo:
+    """File-like object whose write() returns the value, for streaming csv.writer rows."""
+    def write(self, value):
+        return value
+
+class AccessLogExportView(APIView):
+    """Stream raw access logs as CSV or NDJSON for auditors, in constant memory."""
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    chunk_size = 2000
+    fields = [
+        'id', 'timestamp', 'user_id', 'user__email', 'user__full_name', 'facility_id', 'facility__name',
+        'status', 'reason', 'user_tier_at_time', 'scan_method', 'direction', 'location'
+    ]
+    content_types = {'csv': 'text/csv', 'ndjson': 'application/x-ndjson'}
+
+    def perform_content_negotiation(self, request, force=False):
+        # ?format=csv|ndjson selects the export format, not a DRF renderer
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request):
+        export_format = request.query_params.get('format', 'csv').lower()
+        if export_format not in self.content_types:
+            return Response({'error': 'format must be one of: ' + ', '.join(self.content_types)}, status=400)
+
+        logs = AccessLog.objects.all()
+        for param in ('facility_id', 'user_id'):
+            if value := request.query_params.get(param):
+                try:
+                    logs = logs.filter(**{param: int(value)})
+                except ValueError:
+                    return Response({'error': f'{param} must be an integer'}, status=400)
+        if value := request.query_params.get('status'):
+            logs = logs.filter(status=value)
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date')
+        logs = filter_date_range(logs, start_date, end_date)
+
+        rows = logs.order_by('timestamp', 'id').values_list(*self.fields).iterator(chunk_size=self.chunk_size)
+        stream = self.stream_csv(rows) if export_format == 'csv' else self.stream_ndjson(rows)
+
+        response = StreamingHttpResponse(stream, content_type=self.content_types[export_format])
+        filename = f"access_logs_{start_date or 'start'}_to_{end_date or 'now'}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def stream_csv(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow([field.replace('__', '_') for field in self.fields])
+        for row in rows:
+            yield writer.writerow(row)
+
+    def stream_ndjson(self, rows):
+        keys = [field.replace('__', '_') for field in self.fields]
+        for row in rows:
+            yield json.dumps(dict(zip(keys, row)), cls=DjangoJSONEncoder) + '\n'
 
 class UserAccessLogsView(generics.ListAPIView):
     serializer_class = AccessLogSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = AccessLogCursorPagination
 
     def get_queryset(self):
         # Return only the current user's access logs
-        return AccessLog.objects.filter(user=self.request.user).order_by('-timestamp')
+        return AccessLog.objects.filter(user=self.request.user).select_related('user', 'facility').order_by('-timestamp')
 
 class UserAccessHistoryView(generics.ListAPIView):
     serializer_class = AccessLogSerializer
     permission_classes = [IsAuthenticated, IsAdminUser]
+    pagination_class = AccessLogCursorPagination
     
     def get_queryset(self):
         user_id = self.request.query_params.get('user_id')
@@ -148,10 +431,6 @@ class UserAccessHistoryView(generics.ListAPIView):
             
         start_date = self.request.query_params.get('start_date')
         end_date = self.request.query_params.get('end_date')
-        
-        if start_date:
-            queryset = queryset.filter(timestamp__date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(timestamp__date__lte=end_date)
+        queryset = filter_date_range(queryset, start_date, end_date)
             
         return queryset.order_by('-timestamp')
\ No newline at end of file
@@ -10,5 +10,5 @@ class NotificationSerializer(serializers.ModelSerializer):
         return localtime(obj.created_at).strftime("%b %d, %Y %H:%M")
     class Meta:
         model = Notification
-        fields = ['id', 'title', 'message', 'created_at', 'is_read', 'category']
-        read_only_fields = ['id', 'title', 'message', 'created_at', 'category']
+        fields = ['id', 'title', 'message', 'created_at', 'is_read', 'category', 'metadata']
+        read_only_fields = ['id', 'title', 'message', 'created_at', 'category', 'metadata']
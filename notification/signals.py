@@ -1,8 +1,27 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.db import transaction
+from django.utils import timezone
+from datetime import timedelta
 from account.models import CustomUser
 from .models import Notification
 from facility.models import AccessLog
+from facility.anomaly import scan_anomaly_detector
+from .tasks import notify_failed_access as notify_failed_access_task, notify_scan_anomaly
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _enqueue(task, *args):
+    # A scan must never fail because the broker is down; send the alert inline instead
+    try:
+        task.delay(*args)
+    except Exception as e:
+        logger.warning(f"Could not queue {task.name}, running inline: {e}")
+        try:
+            task(*args)
+        except Exception as e:
+            logger.error(f"{task.name} failed inline for {args}: {e}")
 
 @receiver(post_save, sender=CustomUser)
 def notify_new_user(sender, instance, created, **kwargs):
@@ -16,20 +35,21 @@ def notify_new_user(sender, instance, created, **kwargs):
 @receiver(post_save, sender=AccessLog)
 def notify_failed_access(sender, instance, created, **kwargs):
     if created and instance.status == 'failed':
-        # Use values_list for more efficient query
-        admin_ids = CustomUser.objects.filter(is_admin=True).values_list('id', flat=True)
-        
-        # Bulk create notifications
-        notifications = [
-            Notification(
-                user_id=admin_id,
-                title="Unauthorized Access Attempt",
-                # message=f"User {instance.user.email} (Tier: {instance.user_tier_at_time}) "
-                #         f"attempted to access {instance.facility.name} (Required Tier: {instance.facility.required_tier}). "
-                #         f"Reason: {instance.reason}",
-                message = f"{instance.user.full_name} ({instance.user.email}) attempted to access {instance.facility.name} without the required tier.",
-                category='security'
-            )
-            for admin_id in admin_ids
-        ]
-        Notification.objects.bulk_create(notifications)
\ No newline at end of file
+        # Admin fan-out runs in Celery so the scan request pays nothing for it
+        access_log_id = instance.pk
+        transaction.on_commit(lambda: _enqueue(notify_failed_access_task, access_log_id))
+
+@receiver(post_save, sender=AccessLog)
+def detect_scan_anomalies(sender, instance, created, **kwargs):
+    if not created:
+        return
+    # Late offline replays would only produce stale alerts
+    if instance.timestamp < timezone.now() - timedelta(seconds=scan_anomaly_detector.max_window):
+        return
+    anomalies = scan_anomaly_detector.observe(
+        instance.user_id, instance.facility_id, instance.status,
+        instance.scan_method, instance.timestamp.timestamp(), instance.direction
+    )
+    access_log_id = instance.pk
+    for kind, details in anomalies:
+        transaction.on_commit(lambda kind=kind, details=details: _enqueue(notify_scan_anomaly, kind, access_log_id, details))
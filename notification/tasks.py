@@ -1,7 +1,10 @@
 from celery import shared_task
+from django.conf import settings
+from django.core.cache import cache
 from django.utils import timezone
 from datetime import timedelta
 from account.models import CustomUser
+from facility.models import AccessLog, Facility
 from .models import Notification
 import logging
 
@@ -22,3 +25,115 @@ def send_membership_expiry_notifications():
         logger.info(f"Sent expiry notifications to {users_to_notify.count()} users.")
     except Exception as e:
         logger.error(f"Error sending expiry notifications: {e}")
+
+
+def failed_access_message(log, count):
+    attempts = f" {count} times" if count > 1 else ""
+    return (f"{log.user.full_name} ({log.user.email}) attempted to access {log.facility.name}"
+            f"{attempts} without the required tier.")
+
+@shared_task(bind=True, max_retries=10)
+def notify_failed_access(self, access_log_id):
+    """Alert every admin about a failed scan, coalescing repeats.
+
+    Further failures by the same member at the same facility within
+    FAILED_ACCESS_ALERT_WINDOW bump ``metadata['count']`` on the existing
+    alerts instead of creating new ones.
+    """
+    log = AccessLog.objects.select_related('user', 'facility').filter(pk=access_log_id).first()
+    if log is None:
+        return
+
+    # Serialize alerts for one (user, facility) so concurrent failures coalesce
+    lock_key = f"notification:failed-access-lock:{log.user_id}:{log.facility_id}"
+    if not cache.add(lock_key, 1, timeout=30):
+        raise self.retry(countdown=1)
+
+    try:
+        window_start = timezone.now() - settings.FAILED_ACCESS_ALERT_WINDOW
+        existing = list(Notification.objects.filter(
+            category='security',
+            created_at__gte=window_start,
+            metadata__kind='failed_access',
+            metadata__user_id=log.user_id,
+            metadata__facility_id=log.facility_id,
+        ))
+
+        if existing:
+            for notification in existing:
+                notification.metadata['count'] = notification.metadata.get('count', 1) + 1
+                notification.metadata['last_access_log_id'] = log.id
+                notification.message = failed_access_message(log, notification.metadata['count'])
+                notification.is_read = False
+            Notification.objects.bulk_update(existing, ['metadata', 'message', 'is_read'])
+            return
+
+        admin_ids = CustomUser.objects.filter(is_admin=True).values_list('id', flat=True)
+        Notification.objects.bulk_create([
+            Notification(
+                user_id=admin_id,
+                title="Unauthorized Access Attempt",
+                message=failed_access_message(log, 1),
+                category='security',
+                metadata={
+                    'kind': 'failed_access',
+                    'user_id': log.user_id,
+                    'facility_id': log.facility_id,
+                    'count': 1,
+                    'first_access_log_id': log.id,
+                    'last_access_log_id': log.id,
+                    'reason': log.reason,
+                }
+            )
+            for admin_id in admin_ids
+        ])
+    finally:
+        cache.delete(lock_key)
+
+
+ANOMALY_TITLES = {
+    'failed_burst': "Repeated Failed Scans",
+    'facility_failed_burst': "Failed Scan Surge at Facility",
+    'impossible_travel': "Account Used at Two Facilities",
+    'method_mix': "Unusual Scan Method Mix",
+}
+
+def scan_anomaly_message(kind, log, details):
+    member = f"{log.user.full_name} ({log.user.email})"
+    if kind == 'failed_burst':
+        return f"{member} failed {details['failures']} scans at {log.facility.name} within {details['seconds']} seconds."
+    if kind == 'facility_failed_burst':
+        return f"{log.facility.name} recorded {details['failures']} failed scans within {details['seconds']} seconds."
+    if kind == 'impossible_travel':
+        previous = Facility.objects.filter(pk=details['previous_facility_id']).values_list('name', flat=True).first()
+        return (f"{member} scanned at {previous or 'another facility'} and {log.facility.name} "
+                f"{details['seconds']} seconds apart.")
+    return f"{member} used {', '.join(details['scan_methods'])} scans in quick succession."
+
+@shared_task
+def notify_scan_anomaly(kind, access_log_id, details):
+    """Alert every admin about a pattern flagged by facility.anomaly."""
+    log = AccessLog.objects.select_related('user', 'facility').filter(pk=access_log_id).first()
+    if log is None:
+        return
+
+    message = scan_anomaly_message(kind, log, details)
+    admin_ids = CustomUser.objects.filter(is_admin=True).values_list('id', flat=True)
+    Notification.objects.bulk_create([
+        Notification(
+            user_id=admin_id,
+            title=ANOMALY_TITLES[kind],
+            message=message,
+            category='security',
+            metadata={
+                'kind': 'scan_anomaly',
+                'anomaly': kind,
+                'user_id': log.user_id,
+                'facility_id': log.facility_id,
+                'access_log_id': log.id,
+                **details,
+            }
+        )
+        for admin_id in admin_ids
+    ])
+    logger.info(f"Scan anomaly {kind} for user {log.user_id} at facility {log.facility_id}")
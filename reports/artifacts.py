@@ -0,0 +1,101 @@
+import hashlib
+import json
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Count, Max
+from facility.models import Facility, AccessLog
+from facility.utils import date_range_bounds, filter_date_range
+from account.models import CustomUser
+from .rendering import render_report, report_filename
+import logging
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_DIR = 'reports/cache'
+
+
+def report_watermark(report_type, facility_id=None, start_date=None, end_date=None):
+    """Cheap stamp of the data a report reads; it moves whenever the report would change."""
+    if report_type == 'membership':
+        users = CustomUser.objects.filter(is_admin=False).aggregate(changed=Max('updated_at'), count=Count('id'))
+        # The count catches deletions, which leave no change stamp behind
+        return [users['changed'].isoformat() if users['changed'] else None, users['count']]
+
+    # Only logs inside the report's range count, so today's scans leave cached
+    # reports of past ranges alone
+    logs = filter_date_range(AccessLog.objects.all(), start_date, end_date)
+    facilities = Facility.objects.all()
+    if facility_id:
+        logs = logs.filter(facility_id=facility_id)
+        facilities = facilities.filter(id=facility_id)
+    # Access logs are never edited, so the highest id covers new and backfilled
+    # rows and the count catches deletions (e.g. cascading from a deleted member).
+    # Rows show member names, so any member edit moves the stamp too; scoping
+    # this to the members in the logs would cost a scan of the logs.
+    stamp = logs.aggregate(last_id=Max('id'), count=Count('id'))
+    users_changed = CustomUser.objects.aggregate(changed=Max('updated_at'))['changed']
+    return [
+        stamp['last_id'],
+        stamp['count'],
+        list(facilities.order_by('id').values_list('id', 'name', 'required_tier')),
+        users_changed.isoformat() if users_changed else None
+    ]
+
+
+def _digest(value, length):
+    return hashlib.sha256(json.dumps(value, default=str).encode()).hexdigest()[:length]
+
+
+def report_params_key(report_type, start_date=None, end_date=None, facility_id=None, engine='xhtml2pdf'):
+    """Normalize request params so equivalent requests share an artifact.
+
+    Raises ValidationError for malformed dates.
+    """
+    start, end = date_range_bounds(start_date, end_date)
+    return _digest([
+        report_type,
+        start.isoformat() if start else None,
+        end.isoformat() if end else None,
+        int(facility_id) if facility_id and report_type == 'access_logs' else None,
+        engine,
+    ], 32)
+
+
+def _artifact_name(report_type, start_date, end_date, facility_id, engine):
+    params_key = report_params_key(report_type, start_date, end_date, facility_id, engine)
+    watermark = _digest(report_watermark(report_type, facility_id, start_date, end_date), 16)
+    return f'{ARTIFACT_DIR}/{params_key}-{watermark}.pdf', params_key
+
+
+def cached_report(report_type, start_date=None, end_date=None, facility_id=None, engine='xhtml2pdf'):
+    """Return ``(pdf, filename)`` if a current artifact is stored, else None."""
+    name, _ = _artifact_name(report_type, start_date, end_date, facility_id, engine)
+    if not default_storage.exists(name):
+        return None
+    logger.info(f"Serving cached {report_type} report {name}")
+    with default_storage.open(name, 'rb') as artifact:
+        return artifact.read(), report_filename(report_type, start_date, end_date)
+
+
+def get_or_render_report(report_type, start_date=None, end_date=None, facility_id=None, progress=None, engine='xhtml2pdf', workers=None):
+    """Return ``(pdf, filename)``, reusing the stored artifact while its watermark holds."""
+    cached = cached_report(report_type, start_date, end_date, facility_id, engine)
+    if cached is not None:
+        return cached
+
+    name, params_key = _artifact_name(report_type, start_date, end_date, facility_id, engine)
+    pdf, filename = render_report(report_type, start_date, end_date, facility_id, progress=progress, engine=engine, workers=workers)
+    _store_artifact(name, params_key, pdf)
+    return pdf, filename
+
+
+def _store_artifact(name, params_key, pdf):
+    # Drop the artifacts of older watermarks for the same params
+    try:
+        _, files = default_storage.listdir(ARTIFACT_DIR)
+    except FileNotFoundError:
+        files = []
+    for stale in files:
+        if stale.startswith(f'{params_key}-'):
+            default_storage.delete(f'{ARTIFACT_DIR}/{stale}')
+    default_storage.save(name, ContentFile(pdf))
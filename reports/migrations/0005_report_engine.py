@@ -0,0 +1,18 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0004_report_generation_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='engine',
+            field=models.CharField(choices=[('xhtml2pdf', 'xhtml2pdf'), ('reportlab', 'ReportLab')], default='xhtml2pdf', max_length=20),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.4 on 2026-10-18 11:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0005_report_engine'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='is_scheduled',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='last_run_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='schedule_window',
+            field=models.CharField(blank=True, choices=[('yesterday', 'Yesterday'), ('last_7_days', 'Last 7 Days'), ('last_30_days', 'Last 30 Days'), ('previous_month', 'Previous Month')], max_length=20, null=True),
+        ),
+    ]
@@ -1,3 +1,4 @@
+from datetime import timedelta
 from django.db import models
 from django.conf import settings
 
@@ -17,6 +18,44 @@ class Report(models.Model):
     start_date = models.DateField(null=True, blank=True)
     end_date = models.DateField(null=True, blank=True)
     facility = models.ForeignKey('facility.Facility', on_delete=models.SET_NULL, null=True, blank=True)
+    # PDF generation job; reports that were never generated have no status
+    status = models.CharField(max_length=20, choices=[
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed')
+    ], null=True, blank=True)
+    engine = models.CharField(max_length=20, choices=[
+        ('xhtml2pdf', 'xhtml2pdf'),
+        ('reportlab', 'ReportLab')
+    ], default='xhtml2pdf')
+    progress = models.PositiveSmallIntegerField(default=0)  # Percent
+    file = models.FileField(upload_to='reports/', null=True, blank=True)
+    error = models.TextField(blank=True, null=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    # Scheduled reports are re-rendered nightly over a window relative to the run date
+    is_scheduled = models.BooleanField(default=False)
+    schedule_window = models.CharField(max_length=20, choices=[
+        ('yesterday', 'Yesterday'),
+        ('last_7_days', 'Last 7 Days'),
+        ('last_30_days', 'Last 30 Days'),
+        ('previous_month', 'Previous Month')
+    ], null=True, blank=True)
+    last_run_at = models.DateTimeField(null=True, blank=True)
+
+    def scheduled_date_range(self, today):
+        """Return the (start_date, end_date) that ``schedule_window`` covers when run on ``today``."""
+        yesterday = today - timedelta(days=1)
+        if self.schedule_window == 'yesterday':
+            return yesterday, yesterday
+        if self.schedule_window == 'last_7_days':
+            return today - timedelta(days=7), yesterday
+        if self.schedule_window == 'last_30_days':
+            return today - timedelta(days=30), yesterday
+        if self.schedule_window == 'previous_month':
+            end = today.replace(day=1) - timedelta(days=1)
+            return end.replace(day=1), end
+        raise ValueError(f'Unknown schedule window: {self.schedule_window}')
 
     def __str__(self):
         return self.title
\ No newline at end of file
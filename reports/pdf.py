@@ -0,0 +1,84 @@
+"""HTML to PDF helpers.
+
+Kept free of model imports so render worker processes can use them without
+setting up Django.
+"""
+import os
+import shutil
+import tempfile
+from io import BytesIO
+from billiard import Process
+from pypdf import PdfReader, PdfWriter
+from xhtml2pdf import pisa
+
+
+class ReportRenderError(Exception):
+    pass
+
+
+def render_pdf(html):
+    buffer = BytesIO()
+    pisa_status = pisa.CreatePDF(html, dest=buffer)
+    if pisa_status.err:
+        raise ReportRenderError(f'Error generating PDF: {pisa_status.err}')
+    return buffer.getvalue()
+
+
+def _render_pdfs_to_files(jobs):
+    """Worker process: render each ``(html, path)`` job to its file."""
+    for html, path in jobs:
+        with open(path, 'wb') as output:
+            output.write(render_pdf(html))
+
+
+def render_pdfs(documents, workers=1, progress=None):
+    """Render a list of HTML documents to PDFs, in parallel when possible.
+
+    Results keep the order of ``documents``. ``progress`` is called with the
+    number of finished documents. Documents are split across billiard
+    processes, which unlike multiprocessing may be started from Celery prefork
+    workers (daemonic processes), so background report jobs are laid out in
+    parallel too. PDFs are handed back through a temporary directory rather
+    than a billiard Pool, whose shutdown stalls for ~30s here.
+    """
+    pdfs = []
+    if workers <= 1 or len(documents) <= 1:
+        for html in documents:
+            pdfs.append(render_pdf(html))
+            if progress is not None:
+                progress(len(pdfs))
+        return pdfs
+
+    directory = tempfile.mkdtemp(prefix='report-')
+    jobs = [(html, os.path.join(directory, f'{index}.pdf')) for index, html in enumerate(documents)]
+    count = min(workers, len(jobs))
+    processes = [Process(target=_render_pdfs_to_files, args=(jobs[offset::count],)) for offset in range(count)]
+    try:
+        for process in processes:
+            process.start()
+        done = 0
+        for offset, process in enumerate(processes):
+            process.join()
+            if process.exitcode != 0:
+                raise ReportRenderError(f'PDF worker exited with code {process.exitcode}')
+            done += len(jobs[offset::count])
+            if progress is not None:
+                progress(done)
+        for html, path in jobs:
+            with open(path, 'rb') as pdf:
+                pdfs.append(pdf.read())
+    finally:
+        for process in processes:
+            if process.pid is not None and process.is_alive():
+                process.terminate()
+        shutil.rmtree(directory, ignore_errors=True)
+    return pdfs
+
+
+def merge_pdfs(pdfs):
+    writer = PdfWriter()
+    for pdf in pdfs:
+        writer.append(PdfReader(BytesIO(pdf)))
+    output = BytesIO()
+    writer.write(output)
+    return output.getvalue()
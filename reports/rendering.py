@@ -0,0 +1,232 @@
+from collections import defaultdict
+from io import BytesIO
+import os
+from django.conf import settings
+from django.template.loader import render_to_string
+from django.db.models import Count, F, Q, Sum, Window
+from django.db.models.functions import Coalesce, RowNumber
+from django.utils import timezone
+from pypdf import PdfReader, PdfWriter
+from facility.models import Facility, AccessLog, AccessLogRollup
+from facility.utils import filter_date_range
+from account.models import CustomUser
+from .pdf import merge_pdfs, render_pdf, render_pdfs
+from . import reportlab_engine
+
+REPORT_TYPES = ['membership', 'access_logs']
+REPORT_ENGINES = ['xhtml2pdf', 'reportlab']
+
+
+def rollup_count_aggregates():
+    """Total/success/failed scan counts summed over AccessLogRollup buckets."""
+    return {
+        'total': Coalesce(Sum('count'), 0),
+        'success': Coalesce(Sum('count', filter=Q(status='success')), 0),
+        'failed': Coalesce(Sum('count', filter=Q(status='failed')), 0),
+    }
+
+
+def report_filename(report_type, start_date=None, end_date=None):
+    if report_type == 'access_logs' and start_date and end_date:
+        return f"access_logs_report_{start_date}_to_{end_date}.pdf"
+    return f"{report_type}_report.pdf"
+
+
+def _report_progress(progress, percent):
+    if progress is not None:
+        progress(percent)
+
+
+def _membership_chunks(users, counts, chunk_size):
+    """Yield lists of report sections holding at most ``chunk_size`` users in total.
+
+    A section is opened on its first user, so a chunk never ends with an empty
+    header; sections without any users still get their (empty) table.
+    """
+    sections, size = [], 0
+    for key, title in (('active', 'Active Members'), ('inactive', 'Inactive Members')):
+        if not counts[key]:
+            sections.append({'title': title, 'count': 0, 'users': [], 'continued': False})
+            continue
+        section, continued = None, False
+        for user in users.filter(is_active=(key == 'active')).iterator(chunk_size=chunk_size):
+            if size == chunk_size:
+                yield sections
+                sections, size, section = [], 0, None
+            if section is None:
+                section = {'title': title, 'count': counts[key], 'users': [], 'continued': continued}
+                sections.append(section)
+                continued = True
+            section['users'].append(user)
+            size += 1
+    if sections:
+        yield sections
+
+
+def membership_report_users(start_date=None, end_date=None):
+    """Members in the report's range and their active/inactive counts."""
+    users = CustomUser.objects.filter(is_admin=False).order_by('-date_joined')
+    users = filter_date_range(users, start_date, end_date, field='date_joined')
+
+    counts = users.aggregate(
+        active=Count('id', filter=Q(is_active=True)),
+        inactive=Count('id', filter=Q(is_active=False))
+    )
+    return users, counts
+
+
+def render_membership_report(start_date=None, end_date=None, progress=None, chunk_size=None, engine='xhtml2pdf'):
+    """Render the membership report ``chunk_size`` users at a time.
+
+    Each chunk is laid out by xhtml2pdf on its own and appended to the output
+    with pypdf, so only one chunk's layout is held in memory at once.
+    """
+    users, counts = membership_report_users(start_date, end_date)
+    filename = report_filename('membership', start_date, end_date)
+    if engine == 'reportlab':
+        return reportlab_engine.render_membership_report(users, counts, start_date, end_date, progress=progress), filename
+
+    chunk_size = chunk_size or settings.REPORT_CHUNK_SIZE
+    total = counts['active'] + counts['inactive']
+
+    writer = PdfWriter()
+    now = timezone.now()
+    done = 0
+    for index, sections in enumerate(_membership_chunks(users, counts, chunk_size)):
+        html = render_to_string('reports/membership_report_template.html', {
+            'show_header': index == 0,
+            'sections': sections,
+            'start_date': start_date,
+            'end_date': end_date,
+            'now': now
+        })
+        writer.append(PdfReader(BytesIO(render_pdf(html))))
+        done += sum(len(section['users']) for section in sections)
+        if total:
+            _report_progress(progress, int(90 * done / total))
+
+    output = BytesIO()
+    writer.write(output)
+    return output.getvalue(), filename
+
+
+def access_logs_report_context(start_date=None, end_date=None, facility_id=None):
+    """Summary and per-facility stats/recent logs shared by both report engines."""
+    facilities = Facility.objects.all()
+    if facility_id:
+        facilities = facilities.filter(id=facility_id)
+
+    summary = {
+        'total_scans': 0,
+        'success_scans': 0,
+        'failed_scans': 0,
+        'success_percentage': 0,
+        'failed_percentage': 0,
+        'facilities': []
+    }
+
+    # Check-outs are left out of the rollups, so they stay out of the detail rows too
+    logs = filter_date_range(AccessLog.objects.exclude(direction='out'), start_date, end_date)
+    rollups = filter_date_range(AccessLogRollup.objects.all(), start_date, end_date, field='hour')
+    if facility_id:
+        logs = logs.filter(facility_id=facility_id)
+        rollups = rollups.filter(facility_id=facility_id)
+
+    # One grouped query over the hourly rollups for every facility; the
+    # per-method rows are summed up into the facility totals below
+    method_counts = defaultdict(list)
+    for row in rollups.values('facility_id', 'scan_method').annotate(**rollup_count_aggregates()).order_by():
+        method_counts[row['facility_id']].append(row)
+
+    # The 100 most recent logs of every facility in one windowed query
+    recent_logs = defaultdict(list)
+    for log in (
+        logs.select_related('user')
+        .annotate(row_number=Window(
+            RowNumber(),
+            partition_by=F('facility_id'),
+            order_by=[F('timestamp').desc(), F('id').desc()]
+        ))
+        .filter(row_number__lte=100)
+        .order_by('facility_id', 'row_number')
+    ):
+        recent_logs[log.facility_id].append(log)
+
+    data = []
+    for facility in facilities:
+        methods = method_counts[facility.id]
+        facility_stats = {
+            'id': facility.id,
+            'name': facility.name,
+            'required_tier': facility.required_tier,
+            'total_scans': sum(row['total'] for row in methods),
+            'success_scans': sum(row['success'] for row in methods),
+            'failed_scans': sum(row['failed'] for row in methods),
+            'scan_methods': [{'scan_method': row['scan_method'], 'count': row['total']} for row in methods]
+        }
+
+        summary['total_scans'] += facility_stats['total_scans']
+        summary['success_scans'] += facility_stats['success_scans']
+        summary['failed_scans'] += facility_stats['failed_scans']
+        summary['facilities'].append(facility_stats)
+
+        data.append({
+            'facility': facility,
+            'logs': recent_logs[facility.id],
+            'stats': facility_stats
+        })
+
+    # Calculate success and failure percentages
+    if summary['total_scans'] > 0:
+        summary['success_percentage'] = (summary['success_scans'] / summary['total_scans']) * 100
+        summary['failed_percentage'] = (summary['failed_scans'] / summary['total_scans']) * 100
+
+    return {
+        'data': data,
+        'summary': summary,
+        'start_date': start_date,
+        'end_date': end_date,
+        'facility': data[0]['facility'] if facility_id and data else None
+    }
+
+
+def render_access_logs_report(start_date=None, end_date=None, facility_id=None, progress=None, engine='xhtml2pdf', workers=None):
+    context = access_logs_report_context(start_date, end_date, facility_id)
+    filename = report_filename('access_logs', start_date, end_date)
+    if engine == 'reportlab':
+        return reportlab_engine.render_access_logs_report(context, progress=progress), filename
+
+    data = context.pop('data')
+    # Summary page plus one document per facility, laid out in parallel
+    documents = [render_to_string('reports/access_logs_report_template.html', {**context, 'show_summary': True, 'data': []})]
+    documents += [
+        render_to_string('reports/access_logs_report_template.html', {**context, 'show_summary': False, 'data': [item]})
+        for item in data
+    ]
+    _report_progress(progress, 10)
+
+    workers = workers or settings.REPORT_RENDER_WORKERS or os.cpu_count() or 1
+    pdfs = render_pdfs(
+        documents,
+        workers=workers,
+        progress=lambda done: _report_progress(progress, 10 + int(80 * done / len(documents)))
+    )
+
+    return merge_pdfs(pdfs), filename
+
+
+def render_report(report_type, start_date=None, end_date=None, facility_id=None, progress=None, engine='xhtml2pdf', workers=None):
+    """Render a report to PDF bytes, returning ``(pdf, filename)``.
+
+    ``engine`` picks xhtml2pdf (HTML templates) or reportlab (tables drawn
+    directly). ``progress`` is called with a percentage as rendering advances.
+    ``workers`` caps the processes laying out sections, defaulting to
+    REPORT_RENDER_WORKERS.
+    """
+    if engine not in REPORT_ENGINES:
+        raise ValueError(f'Unknown report engine: {engine}')
+    if report_type == 'membership':
+        return render_membership_report(start_date, end_date, progress=progress, engine=engine)
+    if report_type == 'access_logs':
+        return render_access_logs_report(start_date, end_date, facility_id, progress=progress, engine=engine, workers=workers)
+    raise ValueError(f'Unknown report type: {report_type}')
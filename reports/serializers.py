@@ -1,6 +1,9 @@
 from rest_framework import serializers
 from facility.models import Facility, AccessLog
+from facility.utils import filter_date_range
+from django.urls import reverse
 from .models import Report
+from .rendering import REPORT_ENGINES, REPORT_TYPES
 from account.models import CustomUser
 
 class FacilityReportSerializer(serializers.ModelSerializer):
@@ -15,12 +18,8 @@ class FacilityReportSerializer(serializers.ModelSerializer):
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
 
-        logs = AccessLog.objects.filter(facility=facility, user__is_admin=False).select_related('user')
-
-        if start_date:
-            logs = logs.filter(timestamp__date__gte=start_date)
-        if end_date:
-            logs = logs.filter(timestamp__date__lte=end_date)
+        logs = AccessLog.objects.filter(facility=facility, user__is_admin=False).exclude(direction='out').select_related('user')
+        logs = filter_date_range(logs, start_date, end_date)
 
         logs = logs.order_by('-timestamp')
 
@@ -48,5 +47,37 @@ class ReportSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Report
-        fields = ['id', 'title', 'type', 'notes', 'created_at', 'created_by', 'created_by_name', 'start_date', 'end_date', 'facility', 'facility_name']
-        read_only_fields = ['created_by', 'created_at']
\ No newline at end of file
+        fields = ['id', 'title', 'type', 'notes', 'created_at', 'created_by', 'created_by_name', 'start_date', 'end_date', 'facility', 'facility_name',
+                  'status', 'engine', 'progress', 'error', 'completed_at', 'is_scheduled', 'schedule_window', 'last_run_at']
+        read_only_fields = ['created_by', 'created_at', 'status', 'progress', 'error', 'completed_at', 'last_run_at']
+
+    def validate(self, data):
+        is_scheduled = data.get('is_scheduled', getattr(self.instance, 'is_scheduled', False))
+        if is_scheduled:
+            if not data.get('schedule_window', getattr(self.instance, 'schedule_window', None)):
+                raise serializers.ValidationError({'schedule_window': 'Scheduled reports need a schedule window.'})
+            if data.get('type', getattr(self.instance, 'type', None)) not in REPORT_TYPES:
+                raise serializers.ValidationError({'type': f"Only {', '.join(REPORT_TYPES)} reports can be scheduled."})
+        return data
+
+class GenerateReportRequestSerializer(serializers.Serializer):
+    type = serializers.ChoiceField(choices=REPORT_TYPES)
+    title = serializers.CharField(max_length=255, required=False)
+    engine = serializers.ChoiceField(choices=REPORT_ENGINES, default='xhtml2pdf')
+    start_date = serializers.DateField(required=False, allow_null=True)
+    end_date = serializers.DateField(required=False, allow_null=True)
+    facility_id = serializers.PrimaryKeyRelatedField(
+        queryset=Facility.objects.all(), source='facility', required=False, allow_null=True
+    )
+
+class ReportStatusSerializer(serializers.ModelSerializer):
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Report
+        fields = ['id', 'type', 'engine', 'status', 'progress', 'error', 'created_at', 'completed_at', 'download_url']
+
+    def get_download_url(self, report):
+        if report.status != 'completed':
+            return None
+        return self.context['request'].build_absolute_uri(reverse('report-download', args=[report.pk]))
\ No newline at end of file
@@ -0,0 +1,66 @@
+from celery import shared_task
+from django.core.files.base import ContentFile
+from django.utils import timezone
+from .models import Report
+from .artifacts import get_or_render_report
+from .rendering import REPORT_TYPES
+import logging
+
+logger = logging.getLogger(__name__)
+
+@shared_task
+def generate_report(report_id):
+    """Render a Report's PDF and attach it to the row, tracking status/progress."""
+    report = Report.objects.filter(pk=report_id).first()
+    if report is None:
+        return
+
+    Report.objects.filter(pk=report_id).update(status='running', progress=0, error=None)
+
+    def progress(percent):
+        Report.objects.filter(pk=report_id).update(progress=percent)
+
+    try:
+        pdf, filename = get_or_render_report(
+            report.type,
+            report.start_date.isoformat() if report.start_date else None,
+            report.end_date.isoformat() if report.end_date else None,
+            report.facility_id,
+            progress=progress,
+            engine=report.engine
+        )
+    except Exception as e:
+        logger.exception(f"Report {report_id} generation failed")
+        Report.objects.filter(pk=report_id).update(status='failed', error=str(e))
+        return
+
+    report.refresh_from_db()
+    if report.file:
+        report.file.delete(save=False)
+    report.file.save(filename, ContentFile(pdf), save=False)
+    report.status = 'completed'
+    report.progress = 100
+    report.completed_at = timezone.now()
+    report.save(update_fields=['file', 'status', 'progress', 'completed_at'])
+    logger.info(f"Generated report {report_id}: {report.file.name}")
+
+@shared_task
+def run_scheduled_reports():
+    """Nightly: point every scheduled report at its rolling window and queue a render.
+
+    The renders also fill the artifact cache. Every window ends yesterday and
+    the watermark only reads logs inside the window, so the same report
+    requested live during the day is served without rendering, unless
+    members were edited or logs in the window backfilled since.
+    """
+    today = timezone.localdate()
+    now = timezone.now()
+    scheduled = Report.objects.filter(is_scheduled=True, type__in=REPORT_TYPES, schedule_window__isnull=False)
+    for report in scheduled:
+        report.start_date, report.end_date = report.scheduled_date_range(today)
+        report.status = 'pending'
+        report.progress = 0
+        report.last_run_at = now
+        report.save(update_fields=['start_date', 'end_date', 'status', 'progress', 'last_run_at'])
+        generate_report.delay(report.id)
+    logger.info(f"Queued {len(scheduled)} scheduled reports for {today}")
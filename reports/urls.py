@@ -5,5 +5,8 @@ urlpatterns = [
     path('reports/', ReportListCreateView.as_view(), name='report-list-create'),
     path('reports/<int:pk>/', ReportRetrieveUpdateDestroyView.as_view(), name='report-detail'),
     path('reports/generate/', GenerateReportView.as_view(), name='generate-report'),
+    path('reports/<int:pk>/status/', ReportStatusView.as_view(), name='report-status'),
+    path('reports/<int:pk>/download/', ReportDownloadView.as_view(), name='report-download'),
+    path('reports/heatmap/', FacilityUsageHeatmapView.as_view(), name='facility-usage-heatmap'),
     path('reports/summary/', FacilityAccessSummaryView.as_view(), name='facility-access-summary'),
 ]
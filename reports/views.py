@@ -1,132 +1,152 @@
-from django.template.loader import render_to_string
-from django.http import HttpResponse
-from xhtml2pdf import pisa
+import os
+from django.http import HttpResponse, FileResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.db import transaction
+from django.conf import settings
+from rest_framework import status
 from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from .permissions import IsAdminUser
-from facility.models import Facility, AccessLog
+from facility.models import Facility, AccessLogRollup
+from facility.utils import date_range_bounds, filter_date_range
 from rest_framework import generics, permissions
 from .models import Report
-from .serializers import ReportSerializer, FacilityReportSerializer, MembershipReportSerializer
-from account.models import CustomUser
-from datetime import datetime
+from .serializers import ReportSerializer, GenerateReportRequestSerializer, ReportStatusSerializer
+from .rendering import REPORT_ENGINES, REPORT_TYPES, rollup_count_aggregates
+from .pdf import ReportRenderError
+from .artifacts import cached_report, get_or_render_report
+from .tasks import generate_report
 from rest_framework.response import Response
-from django.db.models import Count, Q
-from django.db import models
+from django.db.models import Sum
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay, Trunc
+from django.utils import timezone
+from datetime import timedelta
+from django.core.cache import cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _enqueue_report(report_id):
+    # Rendering inline would defeat the job flow; fail the job so pollers see it
+    try:
+        generate_report.delay(report_id)
+    except Exception as e:
+        logger.error(f"Could not queue report {report_id}: {e}")
+        Report.objects.filter(pk=report_id).update(status='failed', error='Could not queue the report, please retry')
 
 class GenerateReportView(APIView):
     permission_classes = [IsAuthenticated, IsAdminUser]
 
     def get(self, request):
         report_type = request.query_params.get('type', '').strip().lower()
-        print(f"Report type received: {report_type}")
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
         facility_id = request.query_params.get('facility_id')
+        engine = request.query_params.get('engine', 'xhtml2pdf').strip().lower()
 
-        if report_type == 'membership':
-            return self.generate_membership_report(start_date, end_date)
-        elif report_type == 'access_logs':
-            return self.generate_access_logs_report(start_date, end_date, facility_id)
-        else:
+        if report_type not in REPORT_TYPES:
             return Response({
                 'error': 'Invalid report type',
-                'valid_types': ['membership', 'access_logs'],
+                'valid_types': REPORT_TYPES,
                 'received_type': report_type
             }, status=400)
 
-    def generate_membership_report(self, start_date, end_date):
-        users = CustomUser.objects.filter(is_admin=False).order_by('-date_joined')
-
-        if start_date:
-            users = users.filter(date_joined__date__gte=start_date)
-        if end_date:
-            users = users.filter(date_joined__date__lte=end_date)
+        if engine not in REPORT_ENGINES:
+            return Response({
+                'error': 'Invalid report engine',
+                'valid_engines': REPORT_ENGINES,
+                'received_engine': engine
+            }, status=400)
 
-        active_users = users.filter(is_active=True)
-        inactive_users = users.filter(is_active=False)
+        if facility_id:
+            try:
+                facility_id = int(facility_id)
+            except ValueError:
+                return Response({'error': 'facility_id must be an integer'}, status=400)
 
-        serializer = MembershipReportSerializer(users, many=True)
+        if report_type == 'access_logs' and not self.is_sync_range(start_date, end_date):
+            cached = cached_report(report_type, start_date, end_date, facility_id, engine)
+            if cached is not None:
+                return self.generate_pdf_response(*cached)
+            # Too long to render within the request; hand it to the job flow
+            params = {'type': report_type, 'engine': engine}
+            for key, value in (('start_date', start_date), ('end_date', end_date), ('facility_id', facility_id)):
+                if value:
+                    params[key] = value
+            return self.queue_report(request, params)
 
-        html = render_to_string('reports/membership_report_template.html', {
-            'active_users': active_users,
-            'inactive_users': inactive_users,
-            'start_date': start_date,
-            'end_date': end_date
-        })
+        try:
+            pdf, filename = get_or_render_report(
+                report_type, start_date, end_date, facility_id,
+                engine=engine, workers=settings.REPORT_SYNC_RENDER_WORKERS
+            )
+        except ReportRenderError as e:
+            return HttpResponse(str(e), status=500)
+        return self.generate_pdf_response(pdf, filename)
 
-        return self.generate_pdf_response(html, 'membership_report.pdf')
+    def post(self, request):
+        """Queue the report as a background job and return its id for polling."""
+        return self.queue_report(request, request.data)
 
-    def generate_access_logs_report(self, start_date, end_date, facility_id):
-        facilities = Facility.objects.all()
-        if facility_id:
-            facilities = facilities.filter(id=facility_id)
-
-        summary = {
-            'total_scans': 0,
-            'success_scans': 0,
-            'failed_scans': 0,
-            'success_percentage': 0,
-            'failed_percentage': 0,
-            'facilities': []
-        }
+    def is_sync_range(self, start_date, end_date):
+        start, end = date_range_bounds(start_date, end_date)
+        return start is not None and end is not None and (end - start).days <= settings.REPORT_SYNC_MAX_DAYS
 
-        data = []
-        for facility in facilities:
-            logs = AccessLog.objects.filter(facility=facility).select_related('user')
-
-            if start_date:
-                logs = logs.filter(timestamp__date__gte=start_date)
-            if end_date:
-                logs = logs.filter(timestamp__date__lte=end_date)
-
-            logs = logs.order_by('-timestamp')
-
-            facility_stats = {
-                'id': facility.id,
-                'name': facility.name,
-                'required_tier': facility.required_tier,
-                'total_scans': logs.count(),
-                'success_scans': logs.filter(status='success').count(),
-                'failed_scans': logs.filter(status='failed').count(),
-                'scan_methods': list(logs.values('scan_method').annotate(count=Count('id')))
-            }
+    def queue_report(self, request, data):
+        serializer = GenerateReportRequestSerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        params = serializer.validated_data
 
-            summary['total_scans'] += facility_stats['total_scans']
-            summary['success_scans'] += facility_stats['success_scans']
-            summary['failed_scans'] += facility_stats['failed_scans']
-            summary['facilities'].append(facility_stats)
+        report = Report.objects.create(
+            title=params.get('title') or f"{params['type'].replace('_', ' ').title()} Report",
+            type=params['type'],
+            start_date=params.get('start_date'),
+            end_date=params.get('end_date'),
+            facility=params.get('facility'),
+            engine=params['engine'],
+            created_by=request.user,
+            status='pending'
+        )
+        transaction.on_commit(lambda: _enqueue_report(report.id))
+        # Outside a transaction the job was queued (or failed) just now
+        report.refresh_from_db(fields=['status'])
 
-            data.append({
-                'facility': facility,
-                'logs': logs[:100],  # Limit to 100 most recent for detailed view
-                'stats': facility_stats
-            })
+        return Response({
+            'id': report.id,
+            'status': report.status,
+            'status_url': request.build_absolute_uri(reverse('report-status', args=[report.id]))
+        }, status=status.HTTP_202_ACCEPTED)
 
-        # Calculate success and failure percentages
-        if summary['total_scans'] > 0:
-            summary['success_percentage'] = (summary['success_scans'] / summary['total_scans']) * 100
-            summary['failed_percentage'] = (summary['failed_scans'] / summary['total_scans']) * 100
+    def generate_pdf_response(self, pdf, filename):
+        response = HttpResponse(pdf, content_type='application/pdf')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
 
-        html = render_to_string('reports/access_logs_report_template.html', {
-            'data': data,
-            'summary': summary,
-            'start_date': start_date,
-            'end_date': end_date,
-            'facility': facilities.first() if facility_id else None
-        })
+class ReportStatusView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
 
-        filename = f"access_logs_report_{start_date}_to_{end_date}.pdf" if start_date and end_date else 'access_logs_report.pdf'
-        return self.generate_pdf_response(html, filename)
+    def get(self, request, pk):
+        report = get_object_or_404(Report, pk=pk)
+        return Response(ReportStatusSerializer(report, context={'request': request}).data)
 
-    def generate_pdf_response(self, html, filename):
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="{filename}"'
-        pisa_status = pisa.CreatePDF(html, dest=response)
+class ReportDownloadView(APIView):
+    permission_classes = [IsAuthenticated, IsAdminUser]
 
-        if pisa_status.err:
-            return HttpResponse(f'Error generating PDF: {pisa_status.err}', status=500)
-        return response
+    def get(self, request, pk):
+        report = get_object_or_404(Report, pk=pk)
+        if report.status != 'completed' or not report.file:
+            return Response({
+                'error': 'Report is not ready',
+                'status': report.status
+            }, status=status.HTTP_409_CONFLICT)
+        return FileResponse(
+            report.file.open('rb'),
+            as_attachment=True,
+            filename=os.path.basename(report.file.name),
+            content_type='application/pdf'
+        )
 
 class ReportListCreateView(generics.ListCreateAPIView):
     queryset = Report.objects.all().order_by('-created_at')
@@ -141,6 +161,47 @@ class ReportRetrieveUpdateDestroyView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ReportSerializer
     permission_classes = [permissions.IsAuthenticated, IsAdminUser]
 
+SUMMARY_BUCKET_STEPS = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+    'week': timedelta(weeks=1),
+    'month': None,  # Calendar months, see _next_bucket
+}
+
+# Zero-filled series longer than this are refused rather than built in memory
+SUMMARY_MAX_BUCKETS = {
+    'hour': 24 * 31,
+    'day': 366 * 2,
+    'week': 52 * 10,
+    'month': 12 * 20,
+}
+
+
+def _bucket_start(value, bucket):
+    value = timezone.localtime(value).replace(minute=0, second=0, microsecond=0)
+    if bucket == 'hour':
+        return value
+    value = value.replace(hour=0)
+    if bucket == 'week':
+        return value - timedelta(days=value.weekday())
+    if bucket == 'month':
+        return value.replace(day=1)
+    return value
+
+
+def _next_bucket(value, bucket):
+    if bucket == 'month':
+        return value.replace(year=value.year + value.month // 12, month=value.month % 12 + 1)
+    return value + SUMMARY_BUCKET_STEPS[bucket]
+
+
+def _bucket_count(start, end, bucket):
+    if bucket == 'month':
+        months = (end.year - start.year) * 12 + end.month - start.month
+        return months + (_bucket_start(end, bucket) < end)
+    return -(-(end - start) // SUMMARY_BUCKET_STEPS[bucket])
+
+
 class FacilityAccessSummaryView(APIView):
     permission_classes = [IsAuthenticated, IsAdminUser]
     
@@ -148,36 +209,34 @@ class FacilityAccessSummaryView(APIView):
         facility_id = request.query_params.get('facility_id')
         start_date = request.query_params.get('start_date')
         end_date = request.query_params.get('end_date')
+        bucket = request.query_params.get('bucket')
+
+        if bucket is not None and bucket not in SUMMARY_BUCKET_STEPS:
+            return Response({
+                'error': 'Invalid bucket',
+                'valid_buckets': list(SUMMARY_BUCKET_STEPS),
+                'received_bucket': bucket
+            }, status=400)
         
-        logs = AccessLog.objects.filter(user__is_admin=False)
+        rollups = AccessLogRollup.objects.filter(user_is_admin=False)
         
         if facility_id:
-            logs = logs.filter(facility_id=facility_id)
-        if start_date:
-            logs = logs.filter(timestamp__date__gte=start_date)
-        if end_date:
-            logs = logs.filter(timestamp__date__lte=end_date)
+            rollups = rollups.filter(facility_id=facility_id)
+        rollups = filter_date_range(rollups, start_date, end_date, field='hour')
             
-        # Get summary statistics
-        total_scans = logs.count()
-        success_scans = logs.filter(status='success').count()
-        failed_scans = logs.filter(status='failed').count()
+        # Get summary statistics from the hourly rollups
+        totals = rollups.aggregate(**rollup_count_aggregates())
+        total_scans = totals['total']
+        success_scans = totals['success']
+        failed_scans = totals['failed']
         
         # Group by user tier
-        tier_stats = logs.values('user_tier_at_time').annotate(
-            total=Count('id'),
-            success=Count('id', filter=models.Q(status='success')),
-            failed=Count('id', filter=models.Q(status='failed'))
-        )
+        tier_stats = rollups.values('user_tier_at_time').annotate(**rollup_count_aggregates()).order_by()
         
         # Group by scan method
-        method_stats = logs.values('scan_method').annotate(
-            total=Count('id'),
-            success=Count('id', filter=models.Q(status='success')),
-            failed=Count('id', filter=models.Q(status='failed'))
-        )
+        method_stats = rollups.values('scan_method').annotate(**rollup_count_aggregates()).order_by()
         
-        return Response({
+        data = {
             'total_scans': total_scans,
             'success_scans': success_scans,
             'failed_scans': failed_scans,
@@ -188,5 +247,108 @@ class FacilityAccessSummaryView(APIView):
                 'start': start_date,
                 'end': end_date
             }
-        })
+        }
+        if bucket:
+            data['bucket'] = bucket
+            data['series'] = self.build_series(rollups, bucket, *date_range_bounds(start_date, end_date))
+        return Response(data)
+
+    def build_series(self, rollups, bucket, start, end):
+        """Total/success/failed per time bucket, zero-filled over the requested range."""
+        # Rollup hours are truncated further in the database, one row per non-empty bucket
+        rows = (
+            rollups.annotate(bucket=Trunc('hour', bucket))
+            .values('bucket')
+            .annotate(**rollup_count_aggregates())
+            .order_by('bucket')
+        )
+        counts = {row['bucket']: row for row in rows}
+        if not counts and not (start and end):
+            return []
+
+        # Without explicit dates the series spans the buckets that have data
+        current = _bucket_start(start or min(counts), bucket)
+        end = end or _next_bucket(_bucket_start(max(counts), bucket), bucket)
+        if _bucket_count(current, end, bucket) > SUMMARY_MAX_BUCKETS[bucket]:
+            raise ValidationError({
+                'bucket': f'At most {SUMMARY_MAX_BUCKETS[bucket]} {bucket} buckets per request; narrow the date range or use a larger bucket'
+            })
+        series = []
+        while current < end:
+            row = counts.get(current, {})
+            series.append({
+                'bucket': current.isoformat(),
+                'total': row.get('total', 0),
+                'success': row.get('success', 0),
+                'failed': row.get('failed', 0),
+            })
+            current = _next_bucket(current, bucket)
+        return series
+
+
+
+class FacilityUsageHeatmapView(APIView):
+    """Day-of-week x hour-of-day scan counts per facility, split by status and tier.
+
+    Binned in the database from the hourly rollups, so the cost depends on the
+    number of hours in the range rather than the number of raw logs.
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    cache_timeout = 60 * 10
+
+    def get(self, request):
+        facility_id = request.query_params.get('facility_id')
+        start_date = request.query_params.get('start_date')
+        end_date = request.query_params.get('end_date')
+
+        cache_key = f"reports:heatmap:{facility_id or 'all'}:{start_date}:{end_date}"
+        data = cache.get(cache_key)
+        if data is None:
+            data = self.build_heatmaps(facility_id, start_date, end_date)
+            cache.set(cache_key, data, self.cache_timeout)
+        return Response(data)
+
+    def build_heatmaps(self, facility_id, start_date, end_date):
+        rollups = AccessLogRollup.objects.filter(user_is_admin=False)
+        if facility_id:
+            rollups = rollups.filter(facility_id=facility_id)
+        rollups = filter_date_range(rollups, start_date, end_date, field='hour')
+
+        # Weekday/hour are extracted in the project time zone
+        buckets = (
+            rollups
+            .annotate(weekday=ExtractIsoWeekDay('hour'), hour_of_day=ExtractHour('hour'))
+            .values('facility_id', 'weekday', 'hour_of_day', 'status', 'user_tier_at_time')
+            .annotate(count=Sum('count'))
+            .order_by()
+        )
 
+        def empty_matrix():
+            return [[0] * 24 for _ in range(7)]
+
+        heatmaps = {}
+        for bucket in buckets:
+            heatmap = heatmaps.setdefault(bucket['facility_id'], {
+                'total': empty_matrix(),
+                'by_status': {'success': empty_matrix(), 'failed': empty_matrix()},
+                'by_tier': {},
+            })
+            day, hour, count = bucket['weekday'] - 1, bucket['hour_of_day'], bucket['count']
+            heatmap['total'][day][hour] += count
+            heatmap['by_status'][bucket['status']][day][hour] += count
+            tier = bucket['user_tier_at_time'] or 'unknown'
+            heatmap['by_tier'].setdefault(tier, empty_matrix())[day][hour] += count
+
+        names = dict(Facility.objects.filter(id__in=heatmaps).values_list('id', 'name'))
+        return {
+            'days': ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday'],
+            'hours': list(range(24)),
+            'facilities': [
+                {'facility_id': facility_id, 'facility_name': names.get(facility_id), **heatmap}
+                for facility_id, heatmap in sorted(heatmaps.items())
+            ],
+            'time_period': {
+                'start': start_date,
+                'end': end_date
+            }
+        }